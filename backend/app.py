@@ -1,117 +1,127 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import hmac
 import joblib
-import re
 import numpy as np
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
-from sklearn.linear_model import LogisticRegression
-from sklearn.naive_bayes import MultinomialNB
 import os
+import threading
+import time
+
+import metrics
+
+from lexicon_scorer import load_lexicon
+from linear_kernel import EXPLAIN_TOP_K
+from long_text import CHUNK_CHARS, score_long_text
+from micro_batcher import MicroBatcher
+from model_bundle import BUNDLE_DIR, FEATURES_VOCABULARY, save_bundle
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+from response_format import FIELDS, MSGPACK, SCORES
+from response_format import encode_msgpack, encode_scores, gzip_body, negotiate, parse_fields
+from review_store import REVIEWS_DB, ReviewStore
+from metrics import timed
+from text_normalizer import clean_text, clean_texts
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Flutter app
 
-# Global variables for models and transformers
-model_lr = None
-model_nb = None
-vectorizer = None
-tfidf_transformer = None
-
-# Model metrics (from training evaluation)
-LR_METRICS = {
-    'accuracy': 0.90,
-    'precision': 0.90,
-    'recall': 0.90,
-    'f1_score': 0.90
-}
-
-NB_METRICS = {
-    'accuracy': 0.86,
-    'precision': 0.86,
-    'recall': 0.86,
-    'f1_score': 0.86
-}
-
-
-def clean_text(text):
-    """Preprocess text same as training"""
-    text = re.sub(r'<br />', ' ', str(text))
-    text = re.sub(r'\d+', '', text)
-    text = re.sub(r'[^\w\s]', '', text)
-    text = text.lower()
-    return text
+# Hot-path stages timed for /metrics; timed() returns them untouched when metrics are off.
+# render() times its own encoding, so it calls the plain jsonify
+timed_clean_text = timed('clean')(clean_text)
+timed_clean_texts = timed('clean')(clean_texts)
+timed_jsonify = timed('serialize')(jsonify)
+
+# Model family to serve: 'vocabulary' (default) or 'hashed' (python train_models.py --features hashed)
+MODEL_VARIANT = os.environ.get('MODEL_VARIANT', FEATURES_VOCABULARY)
+
+# Seconds between checks of models/ for new artifacts; 0 disables the watcher
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '0'))
+
+# Seconds between checks for the stamp an admin reload leaves, so every Gunicorn
+# worker follows it even with MODEL_WATCH_INTERVAL=0; 0 disables
+RELOAD_STAMP_INTERVAL = float(os.environ.get('RELOAD_STAMP_INTERVAL', '2'))
+
+# Required in the X-Admin-Token header of admin endpoints; when unset the admin endpoints are disabled
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Largest number of texts accepted by /api/predict/batch in one request
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '256'))
+
+# Longest movie title accepted by search and review ingestion
+MAX_TITLE_CHARS = int(os.environ.get('MAX_TITLE_CHARS', '200'))
+
+# Request bodies above this are answered 413 before they are parsed
+MAX_REQUEST_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', str(16 * 1024 * 1024)))
+
+# /api/predict texts longer than LONG_TEXT_CHARS are cleaned and tokenized in
+# LONG_TEXT_CHUNK_CHARS spans (long_text.py); texts over MAX_TEXT_CHARS are refused
+LONG_TEXT_CHARS = int(os.environ.get('LONG_TEXT_CHARS', '20000'))
+LONG_TEXT_CHUNK_CHARS = int(os.environ.get('LONG_TEXT_CHUNK_CHARS', str(CHUNK_CHARS)))
+MAX_TEXT_CHARS = int(os.environ.get('MAX_TEXT_CHARS', '2000000'))
+
+# Seconds of scoring per long text; the rest of the text is skipped once it is spent. 0 = no limit
+LONG_TEXT_BUDGET = float(os.environ.get('LONG_TEXT_BUDGET', '2'))
+
+# Tokens listed per model by "explain": true unless the request sets "top_k" (at most MAX_EXPLAIN_TOP_K)
+DEFAULT_EXPLAIN_TOP_K = int(os.environ.get('EXPLAIN_TOP_K', str(EXPLAIN_TOP_K)))
+MAX_EXPLAIN_TOP_K = 50
+
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+
+# Scores predictions while no models are loaded; LEXICON_PATH points to a "term<TAB>weight" file
+fallback_scorer = load_lexicon(os.environ.get('LEXICON_PATH'))
+
+# Scores keyed on clean_text output; size 0 disables, TTL 0 means no expiry
+prediction_cache = PredictionCache(
+    max_size=int(os.environ.get('PREDICTION_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', '0')) or None
+)
+
+
+def on_models_swapped(model_set):
+    """Drop everything derived from the previous models"""
+    prediction_cache.clear()
+    review_store.invalidate()
+    print(f"✓ Serving model version {model_set.version} ({model_set.variant} features, from {model_set.source})")
+
+
+# The live models; each request reads model_registry.current once and uses that set throughout
+model_registry = ModelRegistry(variant=MODEL_VARIANT, on_swap=on_models_swapped)
 
 
 def load_models():
     """Load saved models and transformers"""
-    global model_lr, model_nb, vectorizer, tfidf_transformer
-    
-    try:
-        # Try to load saved models
-        if os.path.exists('models/logreg_model.pkl'):
-            model_lr = joblib.load('models/logreg_model.pkl')
-            print("✓ Loaded Logistic Regression model")
-        if os.path.exists('models/naive_bayes_model.pkl'):
-            model_nb = joblib.load('models/naive_bayes_model.pkl')
-            print("✓ Loaded Naive Bayes model")
-        if os.path.exists('models/vectorizer.pkl'):
-            vectorizer = joblib.load('models/vectorizer.pkl')
-            print("✓ Loaded Vectorizer")
-        if os.path.exists('models/tfidf.pkl'):
-            tfidf_transformer = joblib.load('models/tfidf.pkl')
-            print("✓ Loaded TF-IDF transformer")
-    except Exception as e:
-        print(f"Error loading models: {e}")
+    result = model_registry.reload(force=True)
+    if result['status'] != 'reloaded':
+        print(f"Error loading models: {result.get('reason')}")
         print("Models will be trained on startup...")
+    return result
 
 
 def train_models():
     """Train models if not loaded from file"""
-    global model_lr, model_nb, vectorizer, tfidf_transformer
-    
     try:
-        import pandas as pd
-        from sklearn.model_selection import train_test_split
-        from sklearn.utils import shuffle
+        # Shares the training script's pipeline and its on-disk feature cache
+        from train_models import DATASET_PATH, MODEL_FILES, evaluate_models, fit_models, prepare_features
+        from train_models import record_metrics
         
         print("Training models...")
         
         # Load dataset
-        df_path = 'data/IMDB Dataset.csv'
+        df_path = DATASET_PATH
         if not os.path.exists(df_path):
             print(f"Dataset not found at {df_path}")
             print("Please download IMDB Dataset.csv and place it in the data/ folder")
             return False
         
-        df = pd.read_csv(df_path)
-        df = shuffle(df, random_state=42)
-        
-        # Preprocess
-        df['review'] = df['review'].apply(clean_text)
-        df['sentiment'] = df['sentiment'].apply(lambda x: 1 if x.lower() == 'positive' else 0)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            df['review'], df['sentiment'], test_size=0.2, random_state=42
+        vectorizer, tfidf_transformer, X_train_tfidf, X_test_tfidf, y_train, y_test, timings = prepare_features(
+            df_path, jobs=os.cpu_count() or 1
         )
         
-        # Vectorize
-        vectorizer = CountVectorizer(stop_words='english')
-        X_train_counts = vectorizer.fit_transform(X_train)
-        X_test_counts = vectorizer.transform(X_test)
-        
-        tfidf_transformer = TfidfTransformer()
-        X_train_tfidf = tfidf_transformer.fit_transform(X_train_counts)
-        X_test_tfidf = tfidf_transformer.transform(X_test_counts)
-        
-        # Train Logistic Regression
-        model_lr = LogisticRegression(max_iter=1000)
-        model_lr.fit(X_train_tfidf, y_train)
+        # Train Logistic Regression and Naive Bayes
+        model_lr, model_nb, fit_timings = fit_models(X_train_tfidf, y_train, jobs=2)
+        timings.update(fit_timings)
         print("✓ Trained Logistic Regression")
-        
-        # Train Naive Bayes
-        model_nb = MultinomialNB()
-        model_nb.fit(X_train_tfidf, y_train)
         print("✓ Trained Naive Bayes")
         
         # Save models
@@ -120,146 +130,261 @@ def train_models():
         joblib.dump(model_nb, 'models/naive_bayes_model.pkl')
         joblib.dump(vectorizer, 'models/vectorizer.pkl')
         joblib.dump(tfidf_transformer, 'models/tfidf.pkl')
+        save_bundle(vectorizer, tfidf_transformer, model_lr, model_nb)
+        record_metrics(BUNDLE_DIR, df_path, vectorizer, X_train_tfidf, X_test_tfidf,
+                       evaluate_models(model_lr, model_nb, X_test_tfidf, y_test), timings, model_files=MODEL_FILES)
         print("✓ Saved models to models/ folder")
         
-        return True
+        # Serve what was just saved
+        return model_registry.reload(force=True)['status'] == 'reloaded'
     except Exception as e:
         print(f"Error training models: {e}")
         return False
 
 
+@timed('score')
+def score_cleaned(cleaned_texts, models):
+    """Score cleaned texts with both models, reusing cached scores where possible"""
+    return prediction_cache.score(cleaned_texts, models.score, models.version)
+
+
+def score_with(cleaned_texts, models):
+    return models.score(cleaned_texts)
+
+
+# Concurrent single-text predictions are scored together; a wait of 0 disables coalescing
+micro_batcher = MicroBatcher(
+    score_with,
+    max_wait=float(os.environ.get('PREDICT_BATCH_WAIT_MS', '2')) / 1000,
+    max_batch_size=int(os.environ.get('PREDICT_BATCH_MAX', '64'))
+)
+
+
+@timed('score')
+def score_single(cleaned_text, models):
+    """Score one cleaned text, coalescing cache misses with concurrent requests on the same models"""
+    return prediction_cache.score([cleaned_text], lambda texts: micro_batcher.score(texts, models), models.version)[0]
+
+
+@timed('parse')
+def request_json():
+    return request.get_json()
+
+
+def score_reviews(reviews):
+    """Score raw reviews for the review store, falling back to the lexicon"""
+    models = model_registry.current
+    if models is None:
+        return fallback_scorer.score(timed_clean_texts(reviews))
+    return models.score(timed_clean_texts(reviews))
+
+
+# Review corpus with per-movie aggregates, built on first search
+review_store = ReviewStore(
+    db_path=os.environ.get('REVIEWS_DB', REVIEWS_DB),
+    score_fn=score_reviews
+)
+
+
 @app.route('/api/search', methods=['POST'])
 def search_movie():
     """Search for a movie and analyze its reviews"""
     try:
         # Validate request
         if not request.is_json:
-            return jsonify({'error': 'Content-Type must be application/json'}), 400
+            return timed_jsonify({'error': 'Content-Type must be application/json'}), 400
         
-        data = request.get_json()
+        data = request_json()
         if 'movie_name' not in data:
-            return jsonify({'error': 'Missing "movie_name" field in request'}), 400
+            return timed_jsonify({'error': 'Missing "movie_name" field in request'}), 400
         
         movie_name = data['movie_name'].strip()
         if not movie_name:
-            return jsonify({'error': 'Movie name cannot be empty'}), 400
-        
-        # Mock movie reviews database (in real app, fetch from IMDb API or web scraping)
-        mock_reviews = {
-            'inception': [
-                'This is an amazing movie with mind-bending plot and excellent cinematography',
-                'Absolutely fantastic! One of the best sci-fi films ever made',
-                'Great storytelling and incredible performances by the cast',
-                'Mind-blowing special effects and a complex but engaging storyline',
-                'Brilliant direction and outstanding visual effects',
-            ],
-            'the dark knight': [
-                'Outstanding performance by Heath Ledger, absolutely brilliant movie',
-                'One of the greatest superhero films ever made',
-                'Incredible action sequences and compelling narrative',
-                'Masterpiece of cinema with phenomenal acting',
-                'Absolutely fantastic film with great plot',
-            ],
-            'the room': [
-                'Terrible movie, one of the worst I have ever seen',
-                'Awful acting and horrible dialogue, waste of time',
-                'Bad plot and poor direction, very disappointing',
-                'Terrible screenplay and awful performances',
-                'Horrible movie, not worth watching',
-            ],
-            'batman forever': [
-                'Bad movie with poor acting and ridiculous plot',
-                'Terrible direction and awful dialogue',
-                'Disappointing and boring, waste of time',
-                'Horrible screenplay, not recommended',
-                'Bad film overall with weak performances',
-            ],
-        }
-        
-        # Find matching reviews (case-insensitive)
-        reviews = None
-        for key in mock_reviews:
-            if key.lower() in movie_name.lower() or movie_name.lower() in key.lower():
-                reviews = mock_reviews[key]
-                break
-        
-        if not reviews:
-            return jsonify({'error': f'No reviews found for movie "{movie_name}"'}), 404
-        
-        # Analyze all reviews
-        sentiments = []
-        for review in reviews:
-            cleaned = clean_text(review)
-            
-            if model_lr is not None and model_nb is not None and vectorizer is not None and tfidf_transformer is not None:
-                text_counts = vectorizer.transform([cleaned])
-                text_tfidf = tfidf_transformer.transform(text_counts)
-                
-                lr_pred = model_lr.predict(text_tfidf)[0]
-                lr_prob = model_lr.predict_proba(text_tfidf)[0]
-                nb_pred = model_nb.predict(text_tfidf)[0]
-                nb_prob = model_nb.predict_proba(text_tfidf)[0]
-                
-                sentiments.append({
-                    'review': review,
-                    'lr_sentiment': 'positive' if lr_pred == 1 else 'negative',
-                    'lr_prob': float(lr_prob[1] if lr_pred == 1 else lr_prob[0]),
-                    'nb_sentiment': 'positive' if nb_pred == 1 else 'negative',
-                    'nb_prob': float(nb_prob[1] if nb_pred == 1 else nb_prob[0]),
-                })
-            else:
-                # Heuristic for mock prediction
-                positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'best', 'awesome', 'brilliant', 'outstanding', 'incredible', 'masterpiece', 'phenomenal']
-                negative_words = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'boring', 'disappointing', 'poor', 'waste', 'weak', 'awful']
-                
-                text_lower = cleaned.lower()
-                pos_count = sum(1 for word in positive_words if word in text_lower)
-                neg_count = sum(1 for word in negative_words if word in text_lower)
-                
-                is_positive = pos_count > neg_count
-                confidence = min(0.95, 0.6 + abs(pos_count - neg_count) * 0.1)
-                
-                sentiments.append({
-                    'review': review,
-                    'lr_sentiment': 'positive' if is_positive else 'negative',
-                    'lr_prob': confidence,
-                    'nb_sentiment': 'positive' if is_positive else 'negative',
-                    'nb_prob': confidence,
-                })
-        
-        # Calculate aggregated sentiment
-        lr_positive_count = sum(1 for s in sentiments if s['lr_sentiment'] == 'positive')
-        nb_positive_count = sum(1 for s in sentiments if s['nb_sentiment'] == 'positive')
-        
-        lr_avg_prob = sum(s['lr_prob'] for s in sentiments) / len(sentiments)
-        nb_avg_prob = sum(s['nb_prob'] for s in sentiments) / len(sentiments)
-        
+            return timed_jsonify({'error': 'Movie name cannot be empty'}), 400
+        if len(movie_name) > MAX_TITLE_CHARS:
+            return timed_jsonify({'error': f'Movie name too long (max {MAX_TITLE_CHARS} characters)'}), 400
+        try:
+            fields = request_fields(data)
+        except ValueError as e:
+            return timed_jsonify({'error': str(e)}), 400
+        
+        movie = review_store.find(movie_name)
+        if movie is None:
+            return timed_jsonify({'error': f'No reviews found for movie "{movie_name}"'}), 404
+        
+        lr_metrics, nb_metrics = model_metrics(model_registry.current)
         response = {
             'movie_name': movie_name,
-            'reviews_analyzed': len(sentiments),
+            'reviews_analyzed': movie.reviews,
             'overall_sentiment': {
                 'logistic_regression': {
-                    'prediction': 'good_to_watch' if lr_positive_count >= len(sentiments) / 2 else 'not_recommended',
-                    'positive_reviews': lr_positive_count,
-                    'negative_reviews': len(sentiments) - lr_positive_count,
-                    'average_confidence': round(lr_avg_prob, 3),
-                    'metrics': LR_METRICS
+                    'prediction': 'good_to_watch' if movie.lr_positive >= movie.reviews / 2 else 'not_recommended',
+                    'positive_reviews': movie.lr_positive,
+                    'negative_reviews': movie.reviews - movie.lr_positive,
+                    'average_confidence': round(movie.lr_prob_sum / movie.reviews, 3),
+                    'metrics': lr_metrics
                 },
                 'naive_bayes': {
-                    'prediction': 'good_to_watch' if nb_positive_count >= len(sentiments) / 2 else 'not_recommended',
-                    'positive_reviews': nb_positive_count,
-                    'negative_reviews': len(sentiments) - nb_positive_count,
-                    'average_confidence': round(nb_avg_prob, 3),
-                    'metrics': NB_METRICS
+                    'prediction': 'good_to_watch' if movie.nb_positive >= movie.reviews / 2 else 'not_recommended',
+                    'positive_reviews': movie.nb_positive,
+                    'negative_reviews': movie.reviews - movie.nb_positive,
+                    'average_confidence': round(movie.nb_prob_sum / movie.reviews, 3),
+                    'metrics': nb_metrics
                 }
             },
-            'sample_reviews': sentiments[:3]  # Return first 3 reviews as samples
+            'sample_reviews': movie.samples  # First reviews as samples
         }
+        if 'metrics' not in fields:
+            for section in response['overall_sentiment'].values():
+                del section['metrics']
+        if 'input_text' not in fields:
+            # The review texts are the bulk of the payload; keep only their scores
+            response['sample_reviews'] = [
+                {key: value for key, value in sample.items() if key != 'review'} for sample in movie.samples
+            ]
         
-        return jsonify(response), 200
+        return render(response), 200
+        
+    except Exception as e:
+        return timed_jsonify({'error': f'Search error: {str(e)}'}), 500
+
+
+@app.route('/api/movies/<path:title>/reviews', methods=['POST'])
+def add_movie_reviews(title):
+    """Ingest new reviews for a movie and update its aggregates"""
+    try:
+        # Validate request
+        if not request.is_json:
+            return timed_jsonify({'error': 'Content-Type must be application/json'}), 400
+        
+        data = request_json()
+        if 'reviews' in data:
+            reviews = data['reviews']
+        elif 'review' in data:
+            reviews = [data['review']]
+        else:
+            return timed_jsonify({'error': 'Missing "reviews" field in request'}), 400
+        
+        if not isinstance(reviews, list) or not reviews:
+            return timed_jsonify({'error': '"reviews" must be a non-empty list'}), 400
+        if len(reviews) > MAX_BATCH_SIZE:
+            return timed_jsonify({'error': f'Too many reviews: {len(reviews)} (max {MAX_BATCH_SIZE})'}), 413
+        if not title.strip():
+            return timed_jsonify({'error': 'Movie title cannot be empty'}), 400
+        if len(title.strip()) > MAX_TITLE_CHARS:
+            return timed_jsonify({'error': f'Movie title too long (max {MAX_TITLE_CHARS} characters)'}), 400
+        
+        stripped = []
+        for i, review in enumerate(reviews):
+            if not isinstance(review, str) or not review.strip():
+                return timed_jsonify({'error': f'Review at index {i} must be a non-empty string'}), 400
+            stripped.append(review.strip())
+        
+        movie = review_store.add_reviews(title.strip(), stripped)
+        return timed_jsonify({
+            'movie_name': movie.title,
+            'reviews_added': len(stripped),
+            'reviews_analyzed': movie.reviews
+        }), 201
         
     except Exception as e:
-        return jsonify({'error': f'Search error: {str(e)}'}), 500
+        return timed_jsonify({'error': f'Ingestion error: {str(e)}'}), 500
+
+
+def model_metrics(models):
+    """(LR, NB) evaluation metrics measured when the models were trained
+
+    (None, None) for lexicon predictions and for models without a training
+    report: there is nothing measured to show.
+    """
+    report = models.metrics if models is not None else None
+    if not report:
+        return None, None
+    return report['models']['logistic_regression'], report['models']['naive_bayes']
+
+
+def prediction_models(score, models, fields=FIELDS, explanation=None):
+    """Build the per-model section of a prediction response, with only the requested fields"""
+    lr_metrics, nb_metrics = model_metrics(models)
+    sections = {}
+    for name, prefix, section_metrics in [('logistic_regression', 'lr', lr_metrics), ('naive_bayes', 'nb', nb_metrics)]:
+        section = {}
+        if 'prediction' in fields:
+            section['prediction'] = score[f'{prefix}_sentiment']
+        if 'probability' in fields:
+            section['probability'] = score[f'{prefix}_prob']
+        if 'metrics' in fields:
+            section['metrics'] = section_metrics
+        if explanation is not None:
+            section['explanation'] = explanation[name]
+        sections[name] = section
+    return sections
+
+
+def prediction_result(text, score, models, fields=FIELDS, explanation=None):
+    """One text's entry in a prediction response"""
+    result = {'input_text': text} if 'input_text' in fields else {}
+    result['models'] = prediction_models(score, models, fields, explanation)
+    if models is None:
+        result['note'] = 'Using lexicon predictions - models not loaded. Train models for accurate predictions.'
+    return result
+
+
+@timed('score')
+def long_text_prediction(text, models, per_chunk, fields=FIELDS, explain_top_k=None):
+    """(response, score) for a long text scored in chunks, bypassing the cache and micro-batcher"""
+    result = score_long_text(text, models.kernel, LONG_TEXT_CHUNK_CHARS, LONG_TEXT_BUDGET or None, per_chunk,
+                             explain_top_k)
+    response = prediction_result(text, result['score'], models, fields, result['explanation'])
+    response['long_text'] = {
+        'chars': len(text),
+        'chars_scored': result['chars_scored'],
+        'complete': result['complete'],
+        'seconds': round(result['seconds'], 4),
+    }
+    if per_chunk:
+        response['chunks'] = result['chunks']
+    return response, result['score']
+
+
+def request_fields(data):
+    """Response fields chosen by "fields"/"verbose" in the body or query string; ValueError if invalid"""
+    return parse_fields(data.get('fields', request.args.get('fields')),
+                        data.get('verbose', request.args.get('verbose')))
+
+
+def request_explain(data):
+    """Tokens per model to explain, from "explain"/"top_k" in the body or query string; None when not asked"""
+    explain = data.get('explain', request.args.get('explain'))
+    if isinstance(explain, str):
+        explain = explain.lower() in ('true', '1', 'yes')
+    if explain is not True:
+        return None
+    top_k = data.get('top_k', request.args.get('top_k', DEFAULT_EXPLAIN_TOP_K))
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        top_k = 0
+    if not 1 <= top_k <= MAX_EXPLAIN_TOP_K:
+        raise ValueError(f'"top_k" must be an integer from 1 to {MAX_EXPLAIN_TOP_K}')
+    return top_k
+
+
+@timed('serialize')
+def render(payload, scores=None):
+    """Encode a successful response in the format the client's Accept header prefers
+
+    Endpoints that pass the score dicts behind payload also offer the fixed-layout binary format.
+    """
+    media_type = negotiate(request.accept_mimetypes, binary=scores is not None)
+    if media_type == SCORES:
+        response = Response(encode_scores(scores), mimetype=SCORES)
+    elif media_type == MSGPACK:
+        response = Response(encode_msgpack(payload), mimetype=MSGPACK)
+    else:
+        response = jsonify(payload)
+    response.vary.add('Accept')
+    return response
 
 
 @app.route('/api/predict', methods=['POST'])
@@ -268,115 +393,260 @@ def predict():
     try:
         # Validate request
         if not request.is_json:
-            return jsonify({'error': 'Content-Type must be application/json'}), 400
+            return timed_jsonify({'error': 'Content-Type must be application/json'}), 400
         
-        data = request.get_json()
+        data = request_json()
         if 'text' not in data:
-            return jsonify({'error': 'Missing "text" field in request'}), 400
+            return timed_jsonify({'error': 'Missing "text" field in request'}), 400
         
         text = data['text'].strip()
         if not text:
-            return jsonify({'error': 'Text cannot be empty'}), 400
+            return timed_jsonify({'error': 'Text cannot be empty'}), 400
+        if len(text) > MAX_TEXT_CHARS:
+            return timed_jsonify({'error': f'Text too long: {len(text)} characters (max {MAX_TEXT_CHARS})'}), 413
+        try:
+            fields = request_fields(data)
+            explain_top_k = request_explain(data)
+        except ValueError as e:
+            return timed_jsonify({'error': str(e)}), 400
         
         # Check if models are loaded
-        if model_lr is None or model_nb is None or vectorizer is None or tfidf_transformer is None:
-            # Return mock predictions for testing when models aren't loaded
-            import random
-            # Simple heuristic: count positive/negative words
-            positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'best', 'awesome', 'brilliant']
-            negative_words = ['bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'boring', 'disappointing', 'poor', 'waste']
-            
-            text_lower = text.lower()
-            pos_count = sum(1 for word in positive_words if word in text_lower)
-            neg_count = sum(1 for word in negative_words if word in text_lower)
-            
-            # Determine sentiment based on word counts
-            is_positive = pos_count > neg_count if (pos_count > 0 or neg_count > 0) else random.random() > 0.5
-            confidence = min(0.95, 0.6 + abs(pos_count - neg_count) * 0.1 + random.uniform(0, 0.15))
-            
-            lr_sentiment = 'positive' if is_positive else 'negative'
-            nb_sentiment = 'positive' if (is_positive or random.random() > 0.3) else 'negative'
-            nb_confidence = min(0.95, confidence + random.uniform(-0.1, 0.1))
-            
-            response = {
-                'input_text': text,
-                'models': {
-                    'logistic_regression': {
-                        'prediction': lr_sentiment,
-                        'probability': round(confidence, 3),
-                        'metrics': LR_METRICS
-                    },
-                    'naive_bayes': {
-                        'prediction': nb_sentiment,
-                        'probability': round(nb_confidence, 3),
-                        'metrics': NB_METRICS
-                    }
-                },
-                'note': 'Using mock predictions - models not loaded. Train models for accurate predictions.'
-            }
-            return jsonify(response), 200
-        
-        # Preprocess text
-        cleaned_text = clean_text(text)
-        
-        # Vectorize
-        text_counts = vectorizer.transform([cleaned_text])
-        text_tfidf = tfidf_transformer.transform(text_counts)
-        
-        # Predict with Logistic Regression
-        lr_pred = model_lr.predict(text_tfidf)[0]
-        lr_prob = model_lr.predict_proba(text_tfidf)[0]
-        lr_sentiment = 'positive' if lr_pred == 1 else 'negative'
-        lr_confidence = float(lr_prob[1] if lr_pred == 1 else lr_prob[0])
-        
-        # Predict with Naive Bayes
-        nb_pred = model_nb.predict(text_tfidf)[0]
-        nb_prob = model_nb.predict_proba(text_tfidf)[0]
-        nb_sentiment = 'positive' if nb_pred == 1 else 'negative'
-        nb_confidence = float(nb_prob[1] if nb_pred == 1 else nb_prob[0])
+        models = model_registry.current
+        if models is None:
+            # Degraded mode: deterministic lexicon scores when models aren't loaded
+            score = fallback_scorer.score([timed_clean_text(text)])[0]
+            return render(prediction_result(text, score, None, fields), [score]), 200
+        
+        per_chunk = data.get('chunks') is True
+        if (per_chunk or len(text) > LONG_TEXT_CHARS) and models.kernel is not None:
+            response, score = long_text_prediction(text, models, per_chunk, fields, explain_top_k)
+            return render(response, [score]), 200
+        
+        # Preprocess, then score together with any concurrent requests
+        cleaned = timed_clean_text(text)
+        score = score_single(cleaned, models)
+        
+        # Explanations read the kernel's contribution table; only the tokens present are looked up
+        explanation = None
+        if explain_top_k and models.kernel is not None:
+            explanation = models.kernel.explain(cleaned, explain_top_k)
         
         # Build response
-        response = {
-            'input_text': text,
-            'models': {
-                'logistic_regression': {
-                    'prediction': lr_sentiment,
-                    'probability': lr_confidence,
-                    'metrics': LR_METRICS
-                },
-                'naive_bayes': {
-                    'prediction': nb_sentiment,
-                    'probability': nb_confidence,
-                    'metrics': NB_METRICS
-                }
-            }
-        }
+        response = prediction_result(text, score, models, fields, explanation)
         
-        return jsonify(response), 200
+        return render(response, [score]), 200
         
     except Exception as e:
-        return jsonify({'error': f'Prediction error: {str(e)}'}), 500
+        return timed_jsonify({'error': f'Prediction error: {str(e)}'}), 500
+
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict sentiment for a list of texts in one vectorized pass"""
+    try:
+        # Validate request
+        if not request.is_json:
+            return timed_jsonify({'error': 'Content-Type must be application/json'}), 400
+        
+        data = request_json()
+        if 'texts' not in data:
+            return timed_jsonify({'error': 'Missing "texts" field in request'}), 400
+        
+        texts = data['texts']
+        if not isinstance(texts, list) or not texts:
+            return timed_jsonify({'error': '"texts" must be a non-empty list'}), 400
+        if len(texts) > MAX_BATCH_SIZE:
+            return timed_jsonify({'error': f'Batch too large: {len(texts)} texts (max {MAX_BATCH_SIZE})'}), 413
+        
+        stripped = []
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                return timed_jsonify({'error': f'Text at index {i} must be a non-empty string'}), 400
+            if len(text) > MAX_TEXT_CHARS:
+                return timed_jsonify({'error': f'Text at index {i} too long (max {MAX_TEXT_CHARS} characters)'}), 413
+            stripped.append(text.strip())
+        try:
+            fields = request_fields(data)
+        except ValueError as e:
+            return timed_jsonify({'error': str(e)}), 400
+        
+        models = model_registry.current
+        if models is None:
+            scores = fallback_scorer.score(timed_clean_texts(stripped))
+        else:
+            # Build one sparse matrix for the whole batch
+            scores = score_cleaned(timed_clean_texts(stripped), models)
+        results = [prediction_result(text, score, models, fields) for text, score in zip(stripped, scores)]
+        
+        return render({'count': len(results), 'results': results}, scores), 200
+        
+    except Exception as e:
+        return timed_jsonify({'error': f'Batch prediction error: {str(e)}'}), 500
 
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    models_loaded = all([model_lr is not None, model_nb is not None, 
-                        vectorizer is not None, tfidf_transformer is not None])
-    return jsonify({
-        'status': 'healthy' if models_loaded else 'models_not_loaded',
-        'models_loaded': models_loaded
+    models = model_registry.current
+    return timed_jsonify({
+        'status': 'healthy' if models is not None else 'models_not_loaded',
+        'models_loaded': models is not None,
+        'model_variant': models.variant if models is not None else None,
+        'model_version': models.version if models is not None else None,
+        'fallback_lexicon': fallback_scorer.describe(),
+        'prediction_cache': prediction_cache.stats(),
+        'micro_batching': micro_batcher.stats()
     }), 200
 
 
+@app.route('/api/models/metrics', methods=['GET'])
+def live_model_metrics():
+    """Training report of the live models: evaluation, corpus size, timings, sizes, latency"""
+    models = model_registry.current
+    if models is None or not models.metrics:
+        return timed_jsonify({'error': 'No training report for the loaded models; retrain with train_models.py'}), 404
+    return timed_jsonify({'version': models.version, 'variant': models.variant, 'report': models.metrics}), 200
+
+
+def admin_denied():
+    """Error response for an admin request, or None when its token is valid"""
+    # No address-based fallback: behind a local reverse proxy every client is 127.0.0.1
+    if not ADMIN_TOKEN:
+        return timed_jsonify({'error': 'Admin endpoints are disabled; set ADMIN_TOKEN to enable them'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return timed_jsonify({'error': 'Forbidden'}), 403
+    return None
+
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """Load, validate and swap in the models currently in models/"""
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    
+    if request.args.get('wait', 'true').lower() == 'false':
+        threading.Thread(target=model_registry.request_reload, name='model-reload', daemon=True).start()
+        return timed_jsonify({'status': 'started'}), 202
+    
+    result = model_registry.request_reload()
+    status_codes = {'reloaded': 200, 'rejected': 422}
+    return timed_jsonify(result), status_codes.get(result['status'], 500)
+
+
+@app.route('/api/admin/models', methods=['GET'])
+def admin_models():
+    """Live model version and the outcome of the last reload"""
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    return timed_jsonify(model_registry.stats()), 200
+
+
+@app.before_request
+def limit_request_size():
+    # Answered here so oversized bodies never reach get_json()
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BYTES:
+        return timed_jsonify({'error': f'Request body too large (max {MAX_REQUEST_BYTES} bytes)'}), 413
+
+
+@app.after_request
+def compress_response(response):
+    # Large bodies (batch results, searches) are gzipped for clients that accept it
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    body = gzip_body(response.get_data(), request.accept_encodings)
+    if body is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@app.before_request
+def start_model_watcher():
+    # Started per process on first request, so it also runs in forked Gunicorn workers
+    model_registry.watch(MODEL_WATCH_INTERVAL, RELOAD_STAMP_INTERVAL)
+
+
+@app.before_request
+def expect_prediction():
+    # The micro-batcher waits for running predictions only, so a lone request is scored at once
+    if request.endpoint == 'predict':
+        micro_batcher.begin_request()
+
+
+@app.teardown_request
+def settle_prediction(exc):
+    micro_batcher.end_request()
+
+
+if metrics.ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        # Per process like the model watcher; a no-op unless METRICS_DIR is set
+        metrics.REGISTRY.start_publisher()
+
+    @app.after_request
+    def record_request_metrics(response):
+        endpoint = request.endpoint or 'unmatched'
+        started = g.get('request_started')
+        if started is not None:
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+        metrics.REQUESTS.inc(endpoint, response.status_code)
+        if response.status_code >= 400:
+            metrics.ERRORS.inc(endpoint, 'server' if response.status_code >= 500 else 'client')
+        # Parsed JSON is cached by the request, so this does not parse the body again;
+        # a body refused as too large is never read
+        data = request.get_json(silent=True) if request.is_json and response.status_code != 413 else None
+        if isinstance(data, dict):
+            texts = data.get('texts') or data.get('reviews') or [data.get('text') or data.get('review')]
+            if isinstance(texts, list):
+                for text in texts:
+                    if isinstance(text, str):
+                        metrics.TEXT_LENGTH.observe(len(text), endpoint)
+        return response
+
+    def current_model_version():
+        models = model_registry.current
+        return models.version if models is not None else 0
+
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_model_version', 'Version of the live model set (0 = none loaded)', current_model_version))
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_prediction_cache_hits_total', 'Prediction cache hits', lambda: prediction_cache.hits, 'counter'))
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_prediction_cache_misses_total', 'Prediction cache misses', lambda: prediction_cache.misses,
+        'counter'))
+    metrics.REGISTRY.register(metrics.SampledHistogram(
+        'sentiment_micro_batch_texts', 'Texts per coalesced /api/predict scoring call',
+        lambda: dict(micro_batcher.size_counts), metrics.BATCH_SIZE_BUCKETS))
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_micro_batch_queue_wait_seconds_total', 'Time texts spent waiting for their micro-batch',
+        lambda: micro_batcher.wait_seconds, 'counter'))
+
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        """Metrics of every worker in the Prometheus text format"""
+        return Response(metrics.REGISTRY.render(metrics.METRICS_DIR), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint"""
-    return jsonify({
+    return timed_jsonify({
         'message': 'IMDB Sentiment Analysis API',
         'endpoints': {
             '/api/predict': 'POST - Predict sentiment',
-            '/api/health': 'GET - Health check'
+            '/api/predict/batch': 'POST - Predict sentiment for a list of texts',
+            '/api/search': 'POST - Aggregate sentiment for a movie',
+            '/api/movies/<title>/reviews': 'POST - Add reviews to a movie',
+            '/api/health': 'GET - Health check',
+            '/api/models/metrics': 'GET - Measured metrics of the live models',
+            '/api/admin/reload': 'POST - Reload models from disk (admin)',
+            '/api/admin/models': 'GET - Live model version (admin)',
+            '/metrics': 'GET - Prometheus metrics (unless METRICS_ENABLED=0)'
         }
     }), 200
 
@@ -390,13 +660,13 @@ if __name__ == '__main__':
     load_models()
     
     # If models not loaded, try to train them
-    if model_lr is None or model_nb is None:
+    if model_registry.current is None:
         print("\nModels not found. Attempting to train...")
         train_models()
     
     # Check if models are ready
-    if model_lr is None or model_nb is None:
-        print("\nℹ Models are not loaded; the server will run using mock predictions.")
+    if model_registry.current is None:
+        print("\nℹ Models are not loaded; the server will run using lexicon predictions.")
         print("To enable real model predictions, either:")
         print("  1) Place the trained model files in the 'models/' folder (logreg_model.pkl, naive_bayes_model.pkl, vectorizer.pkl, tfidf.pkl), or")
         print("  2) Provide the dataset at 'data/IMDB Dataset.csv' and the server will attempt to train and save models on startup.")
@@ -405,7 +675,8 @@ if __name__ == '__main__':
         print("\n✓ All models loaded successfully!")
     
     print("\nStarting server on http://localhost:8000")
-    print("Press CTRL+C to stop\n")
+    print("Press CTRL+C to stop")
+    print("(Development server; for production run: gunicorn -c gunicorn.conf.py wsgi:application)\n")
     
     app.run(host='0.0.0.0', port=8000, debug=True)
 
@@ -0,0 +1,92 @@
+"""
+Parity check and latency benchmark for the collapsed linear kernel
+
+Compares linear_kernel.LinearKernel (built from both the bundle and the
+sklearn objects) against the sklearn CountVectorizer -> TfidfTransformer ->
+predict_proba pipeline on a larger corpus than tests/test_linear_kernel.py.
+Exits non-zero if any probability differs by more than 1e-12 or any label
+differs; then reports single-text and batch latency.
+
+Usage: python benchmarks/bench_kernel.py [--requests 2000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+from synthetic import fit_pipeline, generate_reviews
+
+from linear_kernel import LinearKernel
+from model_bundle import load_bundle, save_bundle
+from scoring import score_texts, score_with_kernel
+from text_normalizer import clean_texts
+
+TOLERANCE = 1e-12
+
+
+def check_parity(name, kernel, queries, vectorizer, tfidf_transformer, model_lr, model_nb):
+    X = tfidf_transformer.transform(vectorizer.transform(queries))
+    lr_probs, nb_probs = kernel.predict_proba(queries)
+    lr_diff = np.abs(lr_probs - model_lr.predict_proba(X)).max()
+    nb_diff = np.abs(nb_probs - model_nb.predict_proba(X)).max()
+    # Single-document path takes a different reduction branch
+    single = np.array([kernel.predict_proba([q])[0][0] for q in queries[:200]])
+    single_diff = np.abs(single - model_lr.predict_proba(X[:200])).max()
+    labels_match = (_labels(score_with_kernel(queries, kernel))
+                    == _labels(score_texts(queries, vectorizer, tfidf_transformer, model_lr, model_nb)))
+    ok = max(lr_diff, nb_diff, single_diff) <= TOLERANCE and labels_match
+    print(f"  {name:<8} max |dp| LR {lr_diff:.1e}  NB {nb_diff:.1e}  single {single_diff:.1e}  "
+          f"labels {'match' if labels_match else 'DIFFER'}")
+    return ok
+
+
+def _labels(scores):
+    return [(s['lr_sentiment'], s['nb_sentiment']) for s in scores]
+
+
+def mean_latency_us(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--train', type=int, default=5000, help='synthetic training reviews')
+    parser.add_argument('--requests', type=int, default=2000, help='scored texts per variant')
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+    
+    reviews, sentiments = generate_reviews(args.train)
+    pipeline = fit_pipeline(clean_texts(reviews), sentiments)
+    queries = clean_texts(generate_reviews(args.requests, seed=7)[0]) + ['', 'the and of', 'zzzqqq']
+    
+    with tempfile.TemporaryDirectory() as directory:
+        save_bundle(*pipeline, directory=directory)
+        kernels = {
+            'bundle': LinearKernel.from_bundle(load_bundle(directory, mmap=False)),
+            'sklearn': LinearKernel.from_sklearn(*pipeline),
+        }
+    
+    print("Parity against sklearn predict_proba")
+    ok = all([check_parity(name, kernel, queries, *pipeline) for name, kernel in kernels.items()])
+    if not ok:
+        print("❌ Kernel probabilities differ from the sklearn pipeline")
+        sys.exit(1)
+    
+    kernel = kernels['bundle']
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+    sk_single = mean_latency_us(lambda q: score_texts([q], *pipeline), queries)
+    k_single = mean_latency_us(lambda q: score_with_kernel([q], kernel), queries)
+    sk_batch = mean_latency_us(lambda b: score_texts(b, *pipeline), batches) / args.batch_size
+    k_batch = mean_latency_us(lambda b: score_with_kernel(b, kernel), batches) / args.batch_size
+    
+    print("Mean latency per text")
+    print(f"  single   sklearn {sk_single:8.1f} us   kernel {k_single:8.1f} us   ({sk_single / k_single:.2f}x)")
+    print(f"  batch{args.batch_size:<3} sklearn {sk_batch:8.1f} us   kernel {k_batch:8.1f} us   ({sk_batch / k_batch:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
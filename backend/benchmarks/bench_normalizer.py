@@ -0,0 +1,84 @@
+"""
+Parity check and throughput benchmark for text_normalizer
+
+Re-checks on a large corpus that clean_text/clean_texts produce
+byte-identical output to the original three-regex clean_text (the parity
+tests themselves are tests/test_text_normalizer.py), then reports reviews/sec for the original
+`Series.apply` path, the new per-item function and the bulk mode. Uses
+data/IMDB Dataset.csv when present, otherwise a synthetic corpus. Exits
+non-zero on any mismatch.
+
+Usage: python benchmarks/bench_normalizer.py [--reviews 50000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from synthetic import generate_reviews
+
+from text_normalizer import clean_text, clean_texts
+
+DATASET_PATH = 'data/IMDB Dataset.csv'
+
+# Inputs that exercise Unicode casing, digits and markup edge cases
+EDGE_CASES = [
+    '', 'ΟΔΥΣΣΕΥΣ', 'Σ', 'İstanbul', 'Straße ﬁlm Ǆ', '٣٤ ²³ ½ 10/10',
+    'a<br />b<br /><br />c', '<br', ' />', 'snake_case-and—dashes', 'tab\there\nnewline',
+]
+
+
+def legacy_clean_text(text):
+    """The original clean_text from app.py / train_models.py"""
+    text = re.sub(r'<br />', ' ', str(text))
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = text.lower()
+    return text
+
+
+def load_reviews(limit):
+    import pandas as pd
+    if os.path.exists(DATASET_PATH):
+        print(f"Using {DATASET_PATH}")
+        return pd.read_csv(DATASET_PATH)['review'].head(limit)
+    print("Dataset not found; using synthetic corpus")
+    return pd.Series(generate_reviews(limit)[0])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=50000, help='number of reviews to process')
+    args = parser.parse_args()
+    
+    import pandas as pd
+    reviews = pd.concat([load_reviews(args.reviews), pd.Series(EDGE_CASES)], ignore_index=True)
+    
+    expected, legacy_time = timed(lambda: reviews.apply(legacy_clean_text))
+    per_item, item_time = timed(lambda: reviews.apply(clean_text))
+    bulk, bulk_time = timed(lambda: clean_texts(reviews))
+    
+    mismatches = sum(
+        1 for want, got_item, got_bulk in zip(expected, per_item, bulk)
+        if not (want == got_item == got_bulk)
+    )
+    print(f"Parity: {len(reviews) - mismatches}/{len(reviews)} identical")
+    if mismatches or not bulk.index.equals(reviews.index):
+        print("❌ Normalizer output differs from the original clean_text")
+        sys.exit(1)
+    
+    n = len(reviews)
+    print(f"  original apply  {n / legacy_time:>12,.0f} reviews/s")
+    print(f"  clean_text      {n / item_time:>12,.0f} reviews/s  ({legacy_time / item_time:.2f}x)")
+    print(f"  clean_texts     {n / bulk_time:>12,.0f} reviews/s  ({legacy_time / bulk_time:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: per-request scoring latency before and after fused scoring
+
+"before" is the original endpoint code path (predict + predict_proba on each
+model); "after" is scoring.score_texts (one predict_proba pass per model).
+
+Usage: python benchmarks/bench_scoring.py [--requests 2000]
+"""
+import argparse
+import time
+
+from synthetic import fit_pipeline, generate_reviews
+
+from scoring import score_texts
+from text_normalizer import clean_text
+
+
+def legacy_score(cleaned, vectorizer, tfidf_transformer, model_lr, model_nb):
+    """The pre-fusion code path from app.predict()"""
+    text_tfidf = tfidf_transformer.transform(vectorizer.transform([cleaned]))
+    lr_pred = model_lr.predict(text_tfidf)[0]
+    lr_prob = model_lr.predict_proba(text_tfidf)[0]
+    nb_pred = model_nb.predict(text_tfidf)[0]
+    nb_prob = model_nb.predict_proba(text_tfidf)[0]
+    return (
+        'positive' if lr_pred == 1 else 'negative',
+        float(lr_prob[1] if lr_pred == 1 else lr_prob[0]),
+        'positive' if nb_pred == 1 else 'negative',
+        float(nb_prob[1] if nb_pred == 1 else nb_prob[0]),
+    )
+
+
+def time_per_request(fn, texts):
+    """Return per-call latencies in microseconds"""
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return latencies
+
+
+def report(name, latencies):
+    n = len(latencies)
+    print(f"  {name:<8} mean {sum(latencies) / n:8.1f} us   "
+          f"p50 {latencies[n // 2]:8.1f} us   p99 {latencies[int(n * 0.99)]:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--train', type=int, default=5000, help='synthetic training reviews')
+    parser.add_argument('--requests', type=int, default=2000, help='scored requests per variant')
+    args = parser.parse_args()
+    
+    reviews, sentiments = generate_reviews(args.train)
+    pipeline = fit_pipeline([clean_text(r) for r in reviews], sentiments)
+    queries = [clean_text(r) for r in generate_reviews(args.requests, seed=7)[0]]
+    
+    # Both paths must agree before their timings mean anything
+    for cleaned in queries[:200]:
+        fused = score_texts([cleaned], *pipeline)[0]
+        assert legacy_score(cleaned, *pipeline) == (
+            fused['lr_sentiment'], fused['lr_prob'], fused['nb_sentiment'], fused['nb_prob'])
+    
+    legacy = time_per_request(lambda t: legacy_score(t, *pipeline), queries)
+    fused = time_per_request(lambda t: score_texts([t], *pipeline), queries)
+    
+    print(f"Per-request scoring latency ({args.requests} requests)")
+    report('before', legacy)
+    report('after', fused)
+    print(f"  speedup  {sum(legacy) / sum(fused):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
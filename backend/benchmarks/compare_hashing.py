@@ -0,0 +1,112 @@
+"""
+Vocabulary vs hashed feature space: accuracy, artifact size, memory and latency
+
+Fits both model families (train_models.make_vectorizer) on the same split,
+exports each as a bundle and reports LR/NB accuracy and F1 on the held-out
+reviews, bundle size on disk, heap allocated per process by loading the
+bundle the way the server does (memory-mapped, so the arrays themselves are
+shared page cache and not counted) plus scoring the test reviews, and mean
+single-text scoring latency. Also checks that the hashed
+bundle reproduces sklearn's HashingVectorizer pipeline; exits non-zero if not.
+
+Usage:
+    python benchmarks/compare_hashing.py                       # synthetic corpus
+    python benchmarks/compare_hashing.py --dataset "data/IMDB Dataset.csv" --hash-bits 18
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from synthetic import fit_pipeline, generate_reviews
+
+from linear_kernel import LinearKernel
+from model_bundle import FEATURES_HASHED, FEATURES_VOCABULARY, bundle_path, load_bundle, save_bundle
+from scoring import score_with_kernel
+from train_models import HASH_BITS, clean_corpus, load_reviews, make_vectorizer, split_corpus
+
+TOLERANCE = 1e-12
+
+
+def load_split(dataset, n_synthetic):
+    """Cleaned (train_texts, train_labels, test_texts, test_labels), split exactly as train_models.py does"""
+    if dataset:
+        df = load_reviews(dataset)
+    else:
+        reviews, sentiments = generate_reviews(n_synthetic)
+        df = pd.DataFrame({'review': reviews, 'sentiment': sentiments})
+    X_train, X_test, y_train, y_test = split_corpus(clean_corpus(df))
+    # fit_pipeline takes the dataset's label strings
+    return X_train.tolist(), ['positive' if y else 'negative' for y in y_train], X_test.tolist(), y_test.tolist()
+
+
+def directory_size(directory):
+    """Bytes of the bundle version saved in directory"""
+    directory = bundle_path(directory)
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def evaluate(features, hash_bits, X_train, y_train, X_test, y_test, queries):
+    from sklearn.metrics import accuracy_score, f1_score
+    
+    pipeline = fit_pipeline(X_train, y_train, make_vectorizer(features, hash_bits))
+    vectorizer, tfidf_transformer, model_lr, model_nb = pipeline
+    X = tfidf_transformer.transform(vectorizer.transform(X_test))
+    row = {'features': features}
+    for name, model in [('lr', model_lr), ('nb', model_nb)]:
+        y_pred = model.predict(X)
+        row[f'{name}_accuracy'] = accuracy_score(y_test, y_pred)
+        row[f'{name}_f1'] = f1_score(y_test, y_pred)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        save_bundle(*pipeline, directory=directory)
+        row['bundle_bytes'] = directory_size(directory)
+        tracemalloc.start()
+        kernel = LinearKernel.from_bundle(load_bundle(directory))
+        lr_probs, nb_probs = kernel.predict_proba(X_test[:500])
+        row['heap_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        row['n_features'] = kernel.table.shape[0]
+        row['parity'] = max(np.abs(lr_probs - model_lr.predict_proba(X[:500])).max(),
+                            np.abs(nb_probs - model_nb.predict_proba(X[:500])).max())
+        
+        start = time.perf_counter()
+        for query in queries:
+            score_with_kernel([query], kernel)
+        row['latency_us'] = (time.perf_counter() - start) / len(queries) * 1e6
+        del kernel
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dataset', help='IMDB CSV to use instead of the synthetic corpus')
+    parser.add_argument('--synthetic', type=int, default=10000, help='synthetic reviews when no --dataset')
+    parser.add_argument('--hash-bits', type=int, default=HASH_BITS)
+    parser.add_argument('--requests', type=int, default=2000, help='single-text requests timed per family')
+    args = parser.parse_args()
+    
+    X_train, y_train, X_test, y_test = load_split(args.dataset, args.synthetic)
+    queries = (X_test * (args.requests // len(X_test) + 1))[:args.requests]
+    rows = [evaluate(features, args.hash_bits, X_train, y_train, X_test, y_test, queries)
+            for features in (FEATURES_VOCABULARY, FEATURES_HASHED)]
+    
+    print(f"{len(X_train)} train / {len(X_test)} test reviews, hashed width 2**{args.hash_bits}")
+    print(f"  {'features':<11}{'columns':>9}{'LR acc':>8}{'LR F1':>8}{'NB acc':>8}{'NB F1':>8}"
+          f"{'disk MB':>9}{'heap MB':>9}{'us/req':>8}{'max |dp|':>10}")
+    for row in rows:
+        print(f"  {row['features']:<11}{row['n_features']:>9}{row['lr_accuracy']:>8.4f}{row['lr_f1']:>8.4f}"
+              f"{row['nb_accuracy']:>8.4f}{row['nb_f1']:>8.4f}{row['bundle_bytes'] / 1e6:>9.2f}"
+              f"{row['heap_bytes'] / 1e6:>9.2f}{row['latency_us']:>8.1f}{row['parity']:>10.1e}")
+    
+    if any(row['parity'] > TOLERANCE for row in rows):
+        print("❌ Bundle probabilities differ from the sklearn pipeline")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+HTTP load test for /api/predict
+
+Runs a fixed number of concurrent clients, each on its own keep-alive
+connection, posting synthetic reviews for a fixed duration, then reports
+requests/sec, latency percentiles and the status code mix (503s show the
+server's back-pressure kicking in). Standard library only.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:application &
+    python benchmarks/load_test.py --concurrency 32 --duration 20
+    python benchmarks/load_test.py --url http://host:8000/api/predict --json
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+from synthetic import generate_reviews
+
+
+def client(url, bodies, deadline, latencies, statuses, lock):
+    """Post bodies round-robin on one keep-alive connection until the deadline"""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = None
+    local_latencies, local_statuses = [], Counter()
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = connection_class(parts.netloc, timeout=30)
+            connection.request('POST', parts.path or '/', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                connection = None
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            if connection is not None:
+                connection.close()
+            connection = None
+        local_latencies.append(time.perf_counter() - start)
+        local_statuses[status] += 1
+    if connection is not None:
+        connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def run(url, concurrency, duration, bodies):
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client, args=(url, bodies[i::concurrency] or bodies, deadline,
+                                                      latencies, statuses, lock))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    ms = np.array(latencies) * 1000
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'requests_per_s': round(len(latencies) / elapsed, 1),
+        'ok_per_s': round(statuses.get(200, 0) / elapsed, 1),
+        'status_counts': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency_ms': {
+            'mean': round(float(ms.mean()), 2) if len(ms) else None,
+            **{f'p{q}': round(float(np.percentile(ms, q)), 2) if len(ms) else None for q in (50, 90, 99)},
+            'max': round(float(ms.max()), 2) if len(ms) else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8000/api/predict')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run')
+    parser.add_argument('--texts', type=int, default=1000, help='distinct synthetic reviews to send')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+    
+    # Distinct texts so the prediction cache does not turn this into a cache benchmark
+    reviews, _ = generate_reviews(args.texts, seed=11)
+    bodies = [json.dumps({'text': review}) for review in reviews]
+    report = run(args.url, args.concurrency, args.duration, bodies)
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    latency = report['latency_ms']
+    print(f"{report['requests']} requests in {report['duration_s']}s with {args.concurrency} clients")
+    print(f"  throughput  {report['requests_per_s']:.1f} req/s ({report['ok_per_s']:.1f} ok/s)")
+    print(f"  latency     p50 {latency['p50']} ms   p90 {latency['p90']} ms   p99 {latency['p99']} ms   "
+          f"max {latency['max']} ms")
+    print(f"  statuses    {report['status_counts']}")
+
+
+if __name__ == '__main__':
+    main()
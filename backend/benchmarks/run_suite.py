@@ -0,0 +1,376 @@
+"""
+Reproducible benchmark suite for the inference and training paths
+
+Generates a synthetic IMDB-like CSV (fixed seed), trains on it in a scratch
+working directory and measures, writing everything to one JSON file:
+
+    train        prepare_features/fit_models stage timings and model save time
+    clean        clean_text / clean_texts throughput
+    vectorize    vectorizer + TF-IDF latency per text, single vs batched, and
+                 the collapsed kernel's equivalent reduction
+    models       LR vs NB predict_proba cost per text, single vs batched
+    cold_start   import + load_models() time and RSS in a fresh interpreter
+    endpoints    /api/predict (cache miss and hit) and /api/search (first
+                 search builds the aggregates) through the Flask test client
+
+Latencies are the median over --repeats rounds. Compare against an earlier
+run with --compare; keys ending in _us/_seconds/_mb are lower-is-better and
+*_per_second higher-is-better, and the script exits 1 when any of them is
+worse by more than --tolerance.
+
+Usage:
+    python benchmarks/run_suite.py --output results/v1.json
+    python benchmarks/run_suite.py --output results/v2.json --compare results/v1.json
+"""
+import argparse
+import contextlib
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import BACKEND_DIR, generate_reviews
+
+from review_store import SEED_PATH
+
+SCHEMA_VERSION = 1
+
+
+def rss_mb():
+    """Resident set size of this process in MB, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def per_item_us(fn, items, repeats, items_per_call=1):
+    """Median over rounds of the mean time per item, calling fn once per element of items"""
+    rounds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        rounds.append((time.perf_counter() - start) / (len(items) * items_per_call) * 1e6)
+    return statistics.median(rounds)
+
+
+def percentiles_us(samples):
+    ordered = sorted(samples)
+    return {
+        'p50_us': ordered[len(ordered) // 2] * 1e6,
+        'p99_us': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+        'mean_us': statistics.fmean(ordered) * 1e6,
+    }
+
+
+def batches_of(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def package_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'git_commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': {name: package_version(name) for name in ('numpy', 'scipy', 'scikit-learn', 'flask')},
+        'settings': {name: os.environ.get(name) for name in
+                     ('METRICS_ENABLED', 'PREDICTION_CACHE_SIZE', 'PREDICT_BATCH_WAIT_MS', 'PREDICT_BATCH_MAX')},
+    }
+
+
+def write_dataset(path, n_reviews, seed):
+    import pandas as pd
+    
+    reviews, sentiments = generate_reviews(n_reviews, seed=seed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({'review': reviews, 'sentiment': sentiments}).to_csv(path, index=False)
+
+
+def bench_train(dataset_path):
+    """Train and save the models in the working directory, recording each stage"""
+    import joblib
+    from model_bundle import save_bundle
+    from train_models import fit_models, prepare_features
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        vectorizer, tfidf_transformer, X_train, X_test, y_train, y_test, timings = prepare_features(
+            dataset_path, use_cache=False)
+        model_lr, model_nb, fit_timings = fit_models(X_train, y_train)
+    timings.update(fit_timings)
+    
+    start = time.perf_counter()
+    os.makedirs('models', exist_ok=True)
+    joblib.dump(model_lr, 'models/logreg_model.pkl')
+    joblib.dump(model_nb, 'models/naive_bayes_model.pkl')
+    joblib.dump(vectorizer, 'models/vectorizer.pkl')
+    joblib.dump(tfidf_transformer, 'models/tfidf.pkl')
+    save_bundle(vectorizer, tfidf_transformer, model_lr, model_nb)
+    timings['save'] = time.perf_counter() - start
+    
+    results = {f'{stage}_seconds': seconds for stage, seconds in timings.items()}
+    results['total_seconds'] = sum(timings.values())
+    results['train_reviews'] = X_train.shape[0]
+    results['vocabulary_size'] = X_train.shape[1]
+    return results, (vectorizer, tfidf_transformer, model_lr, model_nb), X_test
+
+
+def bench_clean(raw_reviews, repeats):
+    from text_normalizer import clean_text, clean_texts
+    
+    megabytes = sum(len(review.encode('utf-8')) for review in raw_reviews) / 2 ** 20
+    single_us = per_item_us(clean_text, raw_reviews, repeats)
+    list_us = per_item_us(clean_texts, [raw_reviews], repeats, items_per_call=len(raw_reviews))
+    return {
+        'single_us': single_us,
+        'list_us': list_us,
+        'docs_per_second': 1e6 / list_us,
+        'mb_per_second': megabytes / (list_us * len(raw_reviews) / 1e6),
+    }
+
+
+def bench_vectorize(queries, pipeline, kernel, repeats, batch_size):
+    vectorizer, tfidf_transformer, _, _ = pipeline
+    
+    def sklearn_transform(texts):
+        return tfidf_transformer.transform(vectorizer.transform(texts))
+    
+    batches = batches_of(queries, batch_size)
+    return {
+        'batch_size': batch_size,
+        'sklearn_single_us': per_item_us(lambda text: sklearn_transform([text]), queries, repeats),
+        'sklearn_batch_us': per_item_us(sklearn_transform, batches, repeats, items_per_call=batch_size),
+        'kernel_single_us': per_item_us(lambda text: kernel.reduce([text]), queries, repeats),
+        'kernel_batch_us': per_item_us(kernel.reduce, batches, repeats, items_per_call=batch_size),
+    }
+
+
+def bench_models(X_test, pipeline, repeats, batch_size):
+    _, _, model_lr, model_nb = pipeline
+    rows = [X_test[i] for i in range(min(X_test.shape[0], 1000))]
+    batches = [X_test[i:i + batch_size] for i in range(0, X_test.shape[0] - batch_size + 1, batch_size)]
+    results = {'batch_size': batch_size}
+    for name, model in [('lr', model_lr), ('nb', model_nb)]:
+        results[f'{name}_single_us'] = per_item_us(model.predict_proba, rows, repeats)
+        results[f'{name}_batch_us'] = per_item_us(model.predict_proba, batches, repeats, items_per_call=batch_size)
+    return results
+
+
+def cold_start_child():
+    """Runs in a fresh interpreter: import the app, load the models, print timings as JSON"""
+    sys.path.insert(0, BACKEND_DIR)
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        imported = time.perf_counter()
+        status = app.load_models()['status']
+    loaded = time.perf_counter()
+    print(json.dumps({
+        'status': status,
+        'source': app.model_registry.current.source if app.model_registry.current else None,
+        'import_seconds': imported - start,
+        'load_models_seconds': loaded - imported,
+        'rss_start_mb': rss_start,
+        'rss_loaded_mb': rss_mb(),
+    }))
+
+
+def bench_cold_start(repeats):
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--cold-start-child'],
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    if runs[0]['status'] != 'reloaded':
+        raise RuntimeError(f"load_models() failed in the cold-start child: {runs[0]['status']}")
+    results = {'source': runs[0]['source']}
+    for key in ('import_seconds', 'load_models_seconds', 'rss_start_mb', 'rss_loaded_mb'):
+        values = [run[key] for run in runs if run[key] is not None]
+        results[key] = statistics.median(values) if values else None
+    if results['rss_loaded_mb'] is not None and results['rss_start_mb'] is not None:
+        results['rss_models_mb'] = results['rss_loaded_mb'] - results['rss_start_mb']
+    return results
+
+
+def bench_endpoints(raw_queries, repeats):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        app.load_models()
+    client = app.app.test_client()
+    
+    def timed_post(path, payload, expect):
+        start = time.perf_counter()
+        response = client.post(path, json=payload)
+        elapsed = time.perf_counter() - start
+        if response.status_code != expect:
+            raise RuntimeError(f"{path} answered {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return elapsed
+    
+    app.prediction_cache.clear()
+    misses = [timed_post('/api/predict', {'text': text}, 200) for text in raw_queries]
+    hits = [timed_post('/api/predict', {'text': raw_queries[0]}, 200) for _ in range(len(raw_queries))]
+    
+    with open(SEED_PATH) as f:
+        queries = list(json.load(f))
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.review_store.invalidate()
+        first_search = timed_post('/api/search', {'movie_name': queries[0]}, 200)
+    searches = [timed_post('/api/search', {'movie_name': query}, 200)
+                for _ in range(repeats * 50) for query in queries]
+    not_found = [timed_post('/api/search', {'movie_name': 'no such movie'}, 404) for _ in range(repeats * 50)]
+    return {
+        'predict_miss': percentiles_us(misses),
+        'predict_hit': percentiles_us(hits),
+        'search_first_seconds': first_search,
+        'search_hit': percentiles_us(searches),
+        'search_miss': percentiles_us(not_found),
+        'micro_batching': app.micro_batcher.enabled,
+    }
+
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    """Print metrics that moved by more than tolerance; return the names of regressions"""
+    regressions = []
+    old = flatten(baseline['results'])
+    print(f"\nCompared with {baseline['environment'].get('git_commit') or 'baseline'} "
+          f"(tolerance {tolerance:.0%})")
+    for name, value in flatten(current['results']).items():
+        previous = old.get(name)
+        if not previous:
+            continue
+        if name.endswith(('_us', '_seconds', '_mb')):
+            change = value / previous - 1
+        elif name.endswith('_per_second'):
+            change = previous / value - 1 if value else float('inf')
+        else:
+            continue
+        if abs(change) > tolerance:
+            worse = change > 0
+            print(f"  {'❌' if worse else '✓'} {name}: {previous:.4g} -> {value:.4g} "
+                  f"({'slower' if worse else 'faster'} by {abs(change):.0%})")
+            if worse:
+                regressions.append(name)
+    if not regressions:
+        print("  No regressions")
+    return regressions
+
+
+def print_summary(results):
+    for section, values in results.items():
+        print(f"\n{section}")
+        for name, value in flatten(values).items():
+            print(f"  {name:<32}{value:>14.4g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write')
+    parser.add_argument('--compare', help='earlier results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative change counted as a regression')
+    parser.add_argument('--reviews', type=int, default=10000, help='synthetic reviews in the training CSV')
+    parser.add_argument('--queries', type=int, default=500, help='texts timed per latency measurement')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=5, help='rounds per measurement; the median is reported')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cold-start-child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.cold_start_child:
+        cold_start_child()
+        return
+    
+    from linear_kernel import LinearKernel
+    from text_normalizer import clean_texts
+    
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    
+    raw_queries = generate_reviews(args.queries, seed=args.seed + 1)[0]
+    queries = clean_texts(raw_queries)
+    results = {}
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        # app.py, train_models.py and the review store use paths relative to the working directory
+        os.chdir(scratch)
+        try:
+            print(f"Training on {args.reviews} synthetic reviews...")
+            dataset_path = os.path.join('data', 'IMDB Dataset.csv')
+            write_dataset(dataset_path, args.reviews, args.seed)
+            results['train'], pipeline, X_test = bench_train(dataset_path)
+            kernel = LinearKernel.from_sklearn(*pipeline)
+            
+            print("Timing clean_text, vectorize and model scoring...")
+            results['clean'] = bench_clean(raw_queries, args.repeats)
+            results['vectorize'] = bench_vectorize(queries, pipeline, kernel, args.repeats, args.batch_size)
+            results['models'] = bench_models(X_test, pipeline, args.repeats, args.batch_size)
+            
+            print("Timing cold start...")
+            results['cold_start'] = bench_cold_start(args.repeats)
+            
+            print("Timing endpoints...")
+            results['endpoints'] = bench_endpoints(raw_queries, args.repeats)
+        finally:
+            os.chdir(workdir)
+    
+    report = {
+        'schema_version': SCHEMA_VERSION,
+        'environment': environment(),
+        'parameters': {name: value for name, value in vars(args).items()
+                       if name not in ('output', 'compare', 'cold_start_child')},
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    print_summary(results)
+    print(f"\n✓ Results written to {output}")
+    
+    if baseline is not None and compare(report, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
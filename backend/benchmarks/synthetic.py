@@ -0,0 +1,89 @@
+"""
+Synthetic IMDB-like corpus and model fitting helpers for the benchmarks
+
+Everything is generated offline from a fixed seed so runs are reproducible
+and do not need the Kaggle dataset.
+"""
+import os
+import random
+import sys
+
+# Make the backend modules importable when run as `python benchmarks/<script>.py`
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+POSITIVE_WORDS = [
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love',
+    'best', 'awesome', 'brilliant', 'outstanding', 'incredible', 'masterpiece',
+    'phenomenal', 'superb', 'moving', 'charming', 'gripping', 'beautiful',
+]
+
+NEGATIVE_WORDS = [
+    'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'boring',
+    'disappointing', 'poor', 'waste', 'weak', 'dull', 'mess', 'lame',
+    'predictable', 'stupid', 'annoying', 'pointless', 'forgettable',
+]
+
+FILLER_WORDS = [
+    'the', 'a', 'of', 'and', 'it', 'was', 'to', 'in', 'is', 'this', 'that',
+    'movie', 'film', 'plot', 'actor', 'actress', 'story', 'scene', 'director',
+    'character', 'music', 'camera', 'ending', 'script', 'cast', 'sequel',
+    'screen', 'audience', 'performance', 'dialogue', 'effects', 'role',
+    'minutes', 'hour', 'time', 'watch', 'saw', 'really', 'very', 'just',
+]
+
+
+def _rare_word(rng):
+    """Random lowercase token so the vocabulary grows like a real corpus"""
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+
+
+def generate_reviews(n_reviews, seed=42, min_words=80, max_words=300):
+    """Return (reviews, sentiments) with IMDB-style markup, digits and punctuation"""
+    rng = random.Random(seed)
+    reviews, sentiments = [], []
+    for _ in range(n_reviews):
+        positive = rng.random() < 0.5
+        major = POSITIVE_WORDS if positive else NEGATIVE_WORDS
+        minor = NEGATIVE_WORDS if positive else POSITIVE_WORDS
+        words = []
+        for _ in range(rng.randint(min_words, max_words)):
+            roll = rng.random()
+            if roll < 0.06:
+                words.append(rng.choice(major))
+            elif roll < 0.08:
+                words.append(rng.choice(minor))
+            elif roll < 0.12:
+                words.append(_rare_word(rng))
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+            if rng.random() < 0.05:
+                words[-1] += rng.choice(['.', ',', '!', '...', '?'])
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), '<br /><br />')
+        if rng.random() < 0.3:
+            words.append(f'{rng.randint(1, 10)}/10')
+        words[0] = words[0].capitalize()
+        reviews.append(' '.join(words))
+        sentiments.append('positive' if positive else 'negative')
+    return reviews, sentiments
+
+
+def fit_pipeline(cleaned_reviews, sentiments, vectorizer=None):
+    """Fit the same vectorizer, TF-IDF and models as train_models.py
+    
+    Pass an unfitted vectorizer (e.g. a HashingVectorizer) to override the default CountVectorizer.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import MultinomialNB
+    
+    labels = [1 if s == 'positive' else 0 for s in sentiments]
+    if vectorizer is None:
+        vectorizer = CountVectorizer(stop_words='english')
+    tfidf_transformer = TfidfTransformer()
+    X = tfidf_transformer.fit_transform(vectorizer.fit_transform(cleaned_reviews))
+    model_lr = LogisticRegression(max_iter=1000).fit(X, labels)
+    model_nb = MultinomialNB().fit(X, labels)
+    return vectorizer, tfidf_transformer, model_lr, model_nb
@@ -0,0 +1,70 @@
+"""
+On-disk cache of the cleaned corpus and train/test count matrices
+
+Cleaning and CountVectorizer.fit_transform over the IMDB corpus dominate
+training time and give the same result every run. Each cache entry lives
+in models/feature_cache/<key>/ where the key hashes the dataset file's
+bytes together with everything that shapes the features (normalizer and
+vectorizer settings, split parameters). Editing the CSV or any of those
+settings therefore misses the cache instead of serving stale matrices.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+FEATURE_CACHE_DIR = 'models/feature_cache'
+
+# Bump when text_normalizer or the cached layout changes meaning
+CACHE_VERSION = 1
+
+
+def file_digest(path, block_size=1 << 20):
+    """blake2b digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(dataset_path, **settings):
+    """Key for a dataset file plus the settings that shape its features"""
+    payload = json.dumps({'version': CACHE_VERSION, 'dataset': file_digest(dataset_path), **settings},
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def load_features(key, cache_dir=FEATURE_CACHE_DIR):
+    """Return (corpus, vectorizer, X_train_counts, X_test_counts, y_train, y_test) or None"""
+    entry = os.path.join(cache_dir, key)
+    if not os.path.exists(os.path.join(entry, 'complete')):
+        return None
+    return (
+        joblib.load(os.path.join(entry, 'corpus.pkl')),
+        joblib.load(os.path.join(entry, 'vectorizer.pkl')),
+        sparse.load_npz(os.path.join(entry, 'X_train_counts.npz')),
+        sparse.load_npz(os.path.join(entry, 'X_test_counts.npz')),
+        np.load(os.path.join(entry, 'y_train.npy')),
+        np.load(os.path.join(entry, 'y_test.npy')),
+    )
+
+
+def save_features(key, corpus, vectorizer, X_train_counts, X_test_counts, y_train, y_test,
+                  cache_dir=FEATURE_CACHE_DIR):
+    """Write one cache entry; the 'complete' marker is written last"""
+    entry = os.path.join(cache_dir, key)
+    if os.path.exists(entry):
+        shutil.rmtree(entry)
+    os.makedirs(entry)
+    joblib.dump(corpus, os.path.join(entry, 'corpus.pkl'))
+    joblib.dump(vectorizer, os.path.join(entry, 'vectorizer.pkl'))
+    sparse.save_npz(os.path.join(entry, 'X_train_counts.npz'), X_train_counts)
+    sparse.save_npz(os.path.join(entry, 'X_test_counts.npz'), X_test_counts)
+    np.save(os.path.join(entry, 'y_train.npy'), np.asarray(y_train))
+    np.save(os.path.join(entry, 'y_test.npy'), np.asarray(y_test))
+    open(os.path.join(entry, 'complete'), 'w').close()
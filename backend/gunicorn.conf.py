@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for serving wsgi:application in production
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Every setting can be overridden from the environment; see wsgi.py for the
+per-worker concurrency and queue limits.
+"""
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:8000')
+
+# Load models once in the master, then fork (copy-on-write sharing)
+preload_app = True
+
+workers = int(os.environ.get('WEB_WORKERS', str(os.cpu_count() or 1)))
+
+# Threads for the running and queued requests admitted by AdmissionLimiter,
+# plus as many again to answer overflow with an immediate 503
+_web_threads = int(os.environ.get('WEB_THREADS', '4'))
+_web_queue = int(os.environ.get('WEB_QUEUE', '16'))
+worker_class = 'gthread'
+threads = _web_threads + 2 * _web_queue
+
+# Connections waiting to be accepted by the kernel
+backlog = int(os.environ.get('WEB_BACKLOG', '256'))
+
+timeout = int(os.environ.get('WEB_TIMEOUT', '30'))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', '5'))
+
+# On SIGTERM workers stop accepting and get this long to finish in-flight requests
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '30'))
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+# Workers publish metric snapshots here, so a /metrics scrape answered by any
+# worker covers all of them; one directory per server, removed on shutdown
+_default_metrics_dir = os.path.join(tempfile.gettempdir(), f'sentiment-metrics-{os.getpid()}')
+os.environ.setdefault('METRICS_DIR', _default_metrics_dir)
+
+
+def on_exit(server):
+    if os.environ['METRICS_DIR'] == _default_metrics_dir:
+        shutil.rmtree(_default_metrics_dir, ignore_errors=True)
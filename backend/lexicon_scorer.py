@@ -0,0 +1,131 @@
+"""
+Deterministic lexicon scorer used when the models are not loaded
+
+Lexicon terms are single words or multi-word phrases with a signed weight.
+They are normalized with the same clean_text as the input and stored in a
+token trie, built once at startup. Scoring walks a cleaned text's tokens in
+one pass. At each token it follows the trie as far as the next tokens allow
+and takes the longest term that matches, so "not good" wins over "good".
+Whole tokens are compared, so "bad" never matches "badminton".
+
+Each token costs one dict lookup plus one more per extra phrase word, so the
+per-request cost does not depend on the lexicon's size.
+
+An external lexicon is a UTF-8 text file with one "term<TAB>weight" entry
+per line; this is the AFINN format. Lines without a tab are split at the
+last space, and '#' starts a comment.
+"""
+from text_normalizer import clean_text
+
+# Weight +1 / -1 entries used when no lexicon file is configured
+POSITIVE_TERMS = [
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic', 'love', 'loved', 'best', 'awesome',
+    'brilliant', 'outstanding', 'incredible', 'masterpiece', 'phenomenal', 'superb', 'enjoyed', 'beautiful',
+    'moving', 'gripping', 'charming', 'perfect', 'must see', 'highly recommend', 'well worth', 'not bad',
+]
+NEGATIVE_TERMS = [
+    'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'hated', 'boring', 'disappointing', 'poor',
+    'waste', 'weak', 'dull', 'stupid', 'pointless', 'mess', 'lame', 'predictable', 'not good', 'not worth',
+    'waste of time', 'fell asleep', 'not recommend',
+]
+
+# Confidence for a net score of s is min(MAX_CONFIDENCE, 0.5 + CONFIDENCE_STEP * |s|)
+CONFIDENCE_STEP = 0.1
+MAX_CONFIDENCE = 0.95
+
+# Trie key holding the weight of the term that ends at a node
+_WEIGHT = None
+
+
+def parse_lexicon(lines):
+    """Yield (term, weight) from lexicon file lines"""
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        term, _, weight = line.rpartition('\t') if '\t' in line else line.rpartition(' ')
+        try:
+            yield term, float(weight)
+        except ValueError:
+            raise ValueError(f'Lexicon line {number}: expected "term<TAB>weight", got {line!r}') from None
+
+
+class LexiconScorer:
+    """Token-trie lexicon producing the same score dicts as the models"""
+
+    def __init__(self, entries, source='built-in'):
+        self.source = source
+        self.terms = 0
+        self.phrases = 0
+        self._root = {}
+        for term, weight in entries:
+            tokens = clean_text(term).split()
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            if _WEIGHT not in node:
+                self.terms += 1
+                self.phrases += len(tokens) > 1
+            node[_WEIGHT] = weight
+
+    @classmethod
+    def default(cls):
+        return cls([(term, 1.0) for term in POSITIVE_TERMS] + [(term, -1.0) for term in NEGATIVE_TERMS])
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(parse_lexicon(f), source=path)
+
+    def polarity(self, cleaned_text):
+        """Sum of the weights of the longest lexicon terms found left to right"""
+        tokens = cleaned_text.split()
+        root = self._root
+        total = 0.0
+        i = 0
+        while i < len(tokens):
+            node = root.get(tokens[i])
+            if node is None:
+                i += 1
+                continue
+            matched_weight, matched_end = node.get(_WEIGHT), i + 1
+            j = i + 1
+            while j < len(tokens):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _WEIGHT in node:
+                    matched_weight, matched_end = node[_WEIGHT], j
+            if matched_weight is None:
+                # Only the start of a phrase that did not complete here
+                i += 1
+                continue
+            total += matched_weight
+            i = matched_end
+        return total
+
+    def score(self, cleaned_texts):
+        """Score cleaned texts; same keys as ModelSet.score, both models reporting the lexicon result"""
+        scores = []
+        for text in cleaned_texts:
+            polarity = self.polarity(text)
+            sentiment = 'positive' if polarity > 0 else 'negative'
+            confidence = round(min(MAX_CONFIDENCE, 0.5 + CONFIDENCE_STEP * abs(polarity)), 3)
+            scores.append({
+                'lr_sentiment': sentiment,
+                'lr_prob': confidence,
+                'nb_sentiment': sentiment,
+                'nb_prob': confidence,
+            })
+        return scores
+
+    def describe(self):
+        return {'source': self.source, 'terms': self.terms, 'phrases': self.phrases}
+
+
+def load_lexicon(path=None):
+    """LexiconScorer from a lexicon file, or the built-in word lists when path is empty"""
+    return LexiconScorer.from_file(path) if path else LexiconScorer.default()
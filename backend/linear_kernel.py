@@ -0,0 +1,195 @@
+"""
+Collapsed linear scoring kernel
+
+Both served models are linear in the TF-IDF features, and TF-IDF is
+count * idf followed by l2 normalization. For a document with token counts
+c_t the whole CountVectorizer -> TfidfTransformer -> model chain reduces to
+
+    norm   = sqrt(sum_t (c_t * idf_t)^2)
+    lr_z   = intercept + sum_t c_t * (idf_t * coef_t) / norm
+    nb_jll = class_log_prior + sum_t c_t * (idf_t * feature_log_prob_t) / norm
+
+so every model is precomputed into one per-token weight table. Bundles
+store the table (model_bundle.KERNEL_TABLE) and the server memory-maps it, so
+worker processes share one copy in the page cache instead of each building
+a private one; only the rows of tokens that occur are ever paged in.
+Scoring tokenizes once, gathers the table rows of the tokens present and
+reduces them; no sklearn call or sparse matrix is built per request.
+
+The same table explains a prediction. A token's share of each model's
+log-odds of the positive class is c_t / norm times a fixed per-token value:
+
+    lr   LR_WEIGHT                    idf_t * coef_t
+    nb   NB_WEIGHT_1 - NB_WEIGHT_0    idf_t * (feature_log_prob_pos_t - feature_log_prob_neg_t)
+
+An explanation looks up the rows of the tokens present and ranks them, with
+no perturbation or extra model calls. The bias (the LR intercept, or the NB
+log prior ratio) plus every token's contribution is exactly the model's
+log-odds.
+"""
+from collections import Counter
+
+import numpy as np
+from scipy.special import expit
+
+from metrics import timed
+
+# Columns of LinearKernel.table
+IDF, LR_WEIGHT, NB_WEIGHT_0, NB_WEIGHT_1 = range(4)
+
+# Tokens listed per model by LinearKernel.explain
+EXPLAIN_TOP_K = 5
+
+
+def weight_table(idf, lr_coef, nb_feature_log_prob):
+    """(n_features, 4) table with the IDF, LR_WEIGHT, NB_WEIGHT_0 and NB_WEIGHT_1 columns"""
+    idf = np.asarray(idf, dtype=np.float64)
+    nb_feature_log_prob = np.asarray(nb_feature_log_prob, dtype=np.float64)
+    return np.column_stack([
+        idf,
+        idf * np.asarray(lr_coef, dtype=np.float64),
+        idf * nb_feature_log_prob[0],
+        idf * nb_feature_log_prob[1],
+    ])
+
+
+class LinearKernel:
+    """Per-token weight tables for the LR and NB models"""
+
+    def __init__(self, token_counts, table, lr_intercept, lr_classes,
+                 nb_class_log_prior, nb_classes, token_terms=None):
+        # token_counts(document) -> (feature columns, counts) for one cleaned text
+        self.token_counts = token_counts
+        # token_terms(document) -> (distinct tokens, their columns, counts); needed by explain()
+        self.token_terms = token_terms
+        # weight_table() output; a memory-mapped table stays mapped (asarray only drops the subclass)
+        self.table = np.asarray(table)
+        self.lr_intercept = float(np.asarray(lr_intercept)[0])
+        self.nb_class_log_prior = np.asarray(nb_class_log_prior, dtype=np.float64)
+        self.lr_classes = np.asarray(lr_classes)
+        self.nb_classes = np.asarray(nb_classes)
+
+    @classmethod
+    def from_bundle(cls, bundle):
+        """Build the kernel from a model_bundle.Bundle, using its stored table when it has one"""
+        table = bundle.kernel_table
+        if table is None:
+            # Bundles exported before the table was stored
+            table = weight_table(bundle.idf, bundle.lr_coef, bundle.nb_feature_log_prob)
+        return cls(bundle.token_counts, table, bundle.lr_intercept, bundle.manifest['lr_classes'],
+                   bundle.nb_class_log_prior, bundle.manifest['nb_classes'], bundle.token_terms)
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, tfidf_transformer, model_lr, model_nb):
+        """Build the kernel from fitted sklearn objects (the pickled models)"""
+        analyzer = vectorizer.build_analyzer()
+        vocabulary = vectorizer.vocabulary_
+
+        def token_counts(document):
+            counts = Counter(vocabulary[token] for token in analyzer(document) if token in vocabulary)
+            return (np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)),
+                    np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+
+        def token_terms(document):
+            counts = Counter(token for token in analyzer(document) if token in vocabulary)
+            columns = np.fromiter((vocabulary[token] for token in counts), dtype=np.intp, count=len(counts))
+            return list(counts), columns, np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+        return cls(token_counts, weight_table(tfidf_transformer.idf_, model_lr.coef_[0], model_nb.feature_log_prob_),
+                   model_lr.intercept_, model_lr.classes_, model_nb.class_log_prior_, model_nb.classes_,
+                   token_terms)
+
+    @timed('tokenize')
+    def tokenize(self, cleaned_texts):
+        """Return (feature columns, counts, tokens per document), concatenated over documents"""
+        columns, counts, lengths = [], [], []
+        for document in cleaned_texts:
+            doc_columns, doc_counts = self.token_counts(document)
+            columns.append(doc_columns)
+            counts.append(doc_counts)
+            lengths.append(len(doc_columns))
+        if not lengths:
+            return np.empty(0, dtype=np.intp), np.empty(0), lengths
+        return (np.concatenate(columns).astype(np.intp, copy=False),
+                np.concatenate(counts).astype(np.float64), lengths)
+
+    def reduce(self, cleaned_texts):
+        """Return (norms, weighted sums) per document; sums are (n_docs, 4) table columns"""
+        return self.weigh(*self.tokenize(cleaned_texts))
+
+    @timed('weigh')
+    def weigh(self, columns, counts, lengths):
+        """TF-IDF weighting and the LR/NB dot products for tokenize() output"""
+        n_docs = len(lengths)
+        if not n_docs:
+            return np.empty(0), np.empty((0, 4))
+
+        contributions = self.table[columns] * counts[:, None]
+        if n_docs == 1:
+            # The common single-request case needs no per-document grouping
+            sums = contributions.sum(axis=0, keepdims=True)
+            norms = np.sqrt(np.array([np.dot(contributions[:, IDF], contributions[:, IDF])]))
+        else:
+            doc_ids = np.repeat(np.arange(n_docs), lengths)
+            sums = np.column_stack([
+                np.bincount(doc_ids, weights=contributions[:, col], minlength=n_docs)
+                for col in range(4)
+            ])
+            norms = np.sqrt(np.bincount(doc_ids, weights=contributions[:, IDF] ** 2, minlength=n_docs))
+        # An empty document has an all-zero TF-IDF row, same as sklearn's normalize()
+        norms[norms == 0.0] = 1.0
+        return norms, sums
+
+    def predict_proba(self, cleaned_texts):
+        """Return (lr_probs, nb_probs), each (n_docs, 2) like sklearn predict_proba"""
+        norms, sums = self.reduce(cleaned_texts)
+        return self.probabilities(norms, sums)
+
+    @timed('proba')
+    def probabilities(self, norms, sums):
+        """LR sigmoid and NB softmax over the reduced sums"""
+        lr_pos = expit(self.lr_intercept + sums[:, LR_WEIGHT] / norms)
+        lr_probs = np.column_stack([1 - lr_pos, lr_pos])
+
+        jll = self.nb_class_log_prior + sums[:, NB_WEIGHT_0:NB_WEIGHT_1 + 1] / norms[:, None]
+        nb_probs = np.exp(jll - np.logaddexp(jll[:, 0], jll[:, 1])[:, None])
+        return lr_probs, nb_probs
+
+    @timed('explain')
+    def explain(self, cleaned_text, top_k=EXPLAIN_TOP_K):
+        """Top-k tokens by absolute contribution to each model's score of one cleaned text"""
+        return self.explain_terms(*self.token_terms(cleaned_text), top_k=top_k)
+
+    def explain_terms(self, terms, columns, counts, top_k=EXPLAIN_TOP_K):
+        """explain() for token_terms() output, e.g. summed over the spans of a long text
+
+        Returns {'logistic_regression': ..., 'naive_bayes': ...}, each with the
+        model's 'bias' and its 'tokens' as {'token', 'count', 'contribution'}
+        dicts, largest |contribution| first. Positive contributions push
+        towards the positive class.
+        """
+        columns = np.asarray(columns, dtype=np.intp)
+        counts = np.asarray(counts, dtype=np.float64)
+        # Hashed tokens can share a column; the TF-IDF norm is taken over columns, as in weigh()
+        _, inverse = np.unique(columns, return_inverse=True)
+        rows = self.table[columns]
+        tfidf = np.bincount(inverse, weights=counts * rows[:, IDF])
+        norm = np.sqrt(np.dot(tfidf, tfidf)) or 1.0
+        scale = counts / norm
+
+        per_model = [
+            ('logistic_regression', self.lr_intercept, rows[:, LR_WEIGHT] * scale),
+            ('naive_bayes', float(self.nb_class_log_prior[1] - self.nb_class_log_prior[0]),
+             (rows[:, NB_WEIGHT_1] - rows[:, NB_WEIGHT_0]) * scale),
+        ]
+        explanation = {}
+        for name, bias, values in per_model:
+            top = np.argsort(-np.abs(values), kind='stable')[:top_k]
+            explanation[name] = {
+                'bias': bias,
+                'tokens': [
+                    {'token': terms[i], 'count': int(counts[i]), 'contribution': float(values[i])}
+                    for i in top.tolist()
+                ],
+            }
+        return explanation
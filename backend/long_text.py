@@ -0,0 +1,127 @@
+"""
+Chunked scoring for long documents
+
+A multi-megabyte review is cut into spans of about CHUNK_CHARS characters,
+and each span is cleaned and tokenized on its own, so the cleaned copy of
+the whole text never exists at once. Token counts are summed as the spans
+go by, and the document is scored once from the totals with the linear
+kernel. The result matches scoring the text in one piece, up to
+floating-point summation order, because:
+
+- spans are cut only at whitespace, never inside a token;
+- spans are never cut inside '<br />', which contains a space;
+- clean_text works character by character everywhere else.
+
+A time budget is checked after every span. When it runs out, the text read
+so far is scored and the result is marked incomplete. Per-span scores come
+from the same token counts, one kernel pass for all spans. An explanation
+sums each span's token terms and ranks them once at the end.
+"""
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from scoring import scores_from_proba
+from text_normalizer import LINE_BREAK, clean_text
+
+# Characters per span; small enough to bound the cleaned copy, large enough to amortize the per-span overhead
+CHUNK_CHARS = 8192
+
+_WHITESPACE = re.compile(r'\s')
+_BREAK_SPACE = LINE_BREAK.index(' ')
+
+
+def _inside_break(text, i):
+    return i >= _BREAK_SPACE and text.startswith(LINE_BREAK, i - _BREAK_SPACE)
+
+
+def _cut_point(text, start, limit):
+    """Index of the whitespace character to end a span at, near limit; len(text) when there is none"""
+    for i in range(limit, start, -1):
+        if text[i].isspace() and not _inside_break(text, i):
+            return i
+    # One unbroken run longer than a span: extend to the next cut point instead of splitting a token
+    match = _WHITESPACE.search(text, limit + 1)
+    while match is not None:
+        if not _inside_break(text, match.start()):
+            return match.start()
+        match = _WHITESPACE.search(text, match.start() + 1)
+    return len(text)
+
+
+def iter_chunks(text, chunk_chars=CHUNK_CHARS):
+    """Yield (start, end) spans covering text, each about chunk_chars characters long"""
+    start = 0
+    while start < len(text):
+        if len(text) - start <= chunk_chars:
+            end = len(text)
+        else:
+            end = _cut_point(text, start, start + chunk_chars)
+        yield start, end
+        start = end
+
+
+def _proba_from_counts(kernel, columns, counts, lengths):
+    norms, sums = kernel.weigh(columns, counts, lengths)
+    lr_probs, nb_probs = kernel.probabilities(norms, sums)
+    return scores_from_proba(lr_probs, kernel.lr_classes, nb_probs, kernel.nb_classes)
+
+
+def score_long_text(text, kernel, chunk_chars=CHUNK_CHARS, time_budget=None, per_chunk=False,
+                    explain_top_k=None):
+    """Score raw text span by span with a linear_kernel.LinearKernel
+
+    Returns a dict with the document 'score' (same keys as the other
+    scoring functions), 'chunks' (list of {'start', 'end', **score} for the
+    raw-text spans when per_chunk, else None), 'chars_scored', 'complete'
+    (False when time_budget seconds ran out first) and 'seconds'. With
+    explain_top_k, 'explanation' holds LinearKernel.explain_terms output for
+    the text scored; otherwise it is None.
+    """
+    started = time.perf_counter()
+    totals = Counter()
+    term_totals = Counter()
+    spans, chunk_columns, chunk_counts = [], [], []
+    chars_scored = 0
+    for start, end in iter_chunks(text, chunk_chars):
+        cleaned = clean_text(text[start:end])
+        columns, counts = kernel.token_counts(cleaned)
+        totals.update(dict(zip(columns.tolist(), counts.tolist())))
+        if explain_top_k:
+            terms, term_columns, term_counts = kernel.token_terms(cleaned)
+            term_totals.update(dict(zip(zip(terms, term_columns.tolist()), term_counts.tolist())))
+        if per_chunk:
+            spans.append((start, end))
+            chunk_columns.append(columns)
+            chunk_counts.append(counts)
+        chars_scored = end
+        if time_budget and time.perf_counter() - started > time_budget:
+            break
+
+    columns = np.fromiter(totals.keys(), dtype=np.intp, count=len(totals))
+    counts = np.fromiter(totals.values(), dtype=np.float64, count=len(totals))
+    score = _proba_from_counts(kernel, columns, counts, [len(columns)])[0]
+
+    chunks = [] if per_chunk else None
+    if spans:
+        chunk_scores = _proba_from_counts(kernel, np.concatenate(chunk_columns).astype(np.intp, copy=False),
+                                          np.concatenate(chunk_counts).astype(np.float64),
+                                          [len(columns) for columns in chunk_columns])
+        chunks = [{'start': start, 'end': end, **chunk_score}
+                  for (start, end), chunk_score in zip(spans, chunk_scores)]
+
+    explanation = None
+    if explain_top_k:
+        explanation = kernel.explain_terms([term for term, _ in term_totals], [column for _, column in term_totals],
+                                           list(term_totals.values()), top_k=explain_top_k)
+
+    return {
+        'score': score,
+        'chunks': chunks,
+        'explanation': explanation,
+        'chars_scored': chars_scored,
+        'complete': chars_scored == len(text),
+        'seconds': time.perf_counter() - started,
+    }
@@ -0,0 +1,265 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format
+
+Counters and histograms are plain Python objects guarded by a lock; there
+is no client library dependency. Hot-path stages are instrumented with the
+timed() decorator, which is applied at import time: with METRICS_ENABLED=0
+it returns the function unchanged, and app.py skips registering its request
+hooks and the /metrics route, so a disabled build pays nothing per request.
+
+Metrics are kept per process, and every series is labelled with the
+process id. When METRICS_DIR is set (gunicorn.conf.py sets it), each process
+also publishes a snapshot of its series there every PUBLISH_INTERVAL
+seconds, and a scrape answered by any Gunicorn worker renders its own live
+series together with the latest snapshots of the other workers.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no', 'off')
+
+# Shared by the workers of one server for their snapshots; unset = each scrape shows one process
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+
+# Seconds between snapshots; a snapshot three intervals old is from a worker that is gone
+PUBLISH_INTERVAL = float(os.environ.get('METRICS_PUBLISH_INTERVAL', '5'))
+
+# Seconds; spans a cache hit (~10us) to a slow long-document request
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Characters per submitted text
+TEXT_LENGTH_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 100000)
+
+# Texts per micro-batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name, _format_labels(self.label_names, label_values), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ['+Inf']
+        for label_values, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names + ('le',), label_values + (bound,))
+                yield f'{self.name}_bucket', labels, cumulative
+            labels = _format_labels(self.label_names, label_values)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Sampled:
+    """Gauge or counter read from a callback at scrape time, so it costs nothing per request"""
+
+    def __init__(self, name, documentation, read, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        value = self.read()
+        if value is not None:
+            yield self.name, '', value
+
+
+class SampledHistogram(Histogram):
+    """Histogram rebuilt at scrape time from a callback returning {observed value: occurrences}"""
+
+    def __init__(self, name, documentation, read, buckets):
+        super().__init__(name, documentation, buckets=buckets)
+        self.read = read
+
+    def samples(self):
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0
+        for value, occurrences in self.read().items():
+            counts[bisect.bisect_left(self.buckets, value)] += occurrences
+            total += value * occurrences
+        with self._lock:
+            self._series = {(): [counts, total]} if any(counts) else {}
+        return super().samples()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self._publisher = None
+        self._publisher_pid = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """[name, kind, documentation, [[sample name, labels, value], ...]] per metric, labelled with this process"""
+        # Every sample carries the process id so series from different Gunicorn workers do not collide
+        worker = f'worker="{os.getpid()}"'
+        families = []
+        for metric in self.metrics:
+            samples = [[name, '{' + worker + (',' + labels[1:] if labels else '}'), value]
+                       for name, labels, value in metric.samples()]
+            families.append([metric.name, metric.kind, metric.documentation, samples])
+        return families
+
+    def render(self, directory=None):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)
+
+        With a directory, the other workers' latest snapshots are merged in,
+        each metric's samples grouped under one HELP/TYPE header.
+        """
+        families = {}
+        for name, kind, documentation, samples in self.collect() + self._snapshots(directory):
+            family = families.setdefault(name, (kind, documentation, []))
+            family[2].extend(samples)
+        lines = []
+        for name, (kind, documentation, samples) in families.items():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(f'{sample}{labels} {_format_value(value)}' for sample, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+    def _snapshots(self, directory):
+        """Families published by the other live processes in directory"""
+        if directory is None:
+            return []
+        families = []
+        own = f'{os.getpid()}.json'
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            if name == own or not name.endswith('.json'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if time.time() - os.path.getmtime(path) > 3 * PUBLISH_INTERVAL:
+                    os.remove(path)
+                    continue
+                with open(path) as f:
+                    families.extend(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return families
+
+    def publish(self, directory):
+        """Write this process's snapshot into directory"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.collect(), f)
+        os.replace(path + '.tmp', path)
+
+    def start_publisher(self, directory=METRICS_DIR, interval=PUBLISH_INTERVAL):
+        """Publish snapshots from a daemon thread; per process, so call it after Gunicorn forks"""
+        if directory is None or interval <= 0 or self._publisher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._publisher_pid == os.getpid():
+                return
+            self._publisher_pid = os.getpid()
+            self._publisher = threading.Thread(target=self._publish_loop, args=(directory, interval),
+                                               name='metrics-publisher', daemon=True)
+            self._publisher.start()
+
+    def _publish_loop(self, directory, interval):
+        while True:
+            try:
+                self.publish(directory)
+            except OSError as e:
+                print(f"Metrics snapshot failed: {e}")
+            time.sleep(interval)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'sentiment_stage_duration_seconds', 'Time spent in each hot-path stage', labels=('stage',)))
+REQUESTS = REGISTRY.register(Counter(
+    'sentiment_requests_total', 'HTTP requests by endpoint and status code', labels=('endpoint', 'status')))
+ERRORS = REGISTRY.register(Counter(
+    'sentiment_request_errors_total', 'HTTP 4xx (client) and 5xx (server) responses by endpoint',
+    labels=('endpoint', 'kind')))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'sentiment_request_duration_seconds', 'Request handling time by endpoint', labels=('endpoint',)))
+TEXT_LENGTH = REGISTRY.register(Histogram(
+    'sentiment_text_length_chars', 'Length of submitted texts by endpoint', labels=('endpoint',),
+    buckets=TEXT_LENGTH_BUCKETS))
+
+
+def timed(stage):
+    """Decorator recording a function's duration as one stage; identity when metrics are off"""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+"""
+Coalesces concurrent single-text predictions into one model call
+
+Request threads hand their cleaned text to a MicroBatcher and block on a
+Future. A background thread takes the first waiting text, keeps collecting
+for at most max_wait seconds or until max_batch_size texts are queued, then
+scores the whole batch with one vectorized call and fans the results back
+out. Under load this turns many one-row transforms into a few wide ones.
+
+Requests announce themselves with begin_request() and end_request(), so
+the collector only waits while some running request has not submitted
+yet; a lone request is scored straight away. A batch therefore never holds
+more texts than there are concurrent requests (WEB_THREADS per Gunicorn
+worker), whatever max_batch_size is.
+
+Extra arguments to score() (e.g. the model set a request started with) are
+passed through to the score function; texts submitted with different
+arguments are never mixed in one call.
+
+The collector thread is started lazily in the process that first submits,
+so a batcher created before Gunicorn forks works in every worker.
+"""
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Thread-safe request coalescer in front of a list -> list score function"""
+
+    def __init__(self, score_fn, max_wait=0.002, max_batch_size=64):
+        # score_fn(list of cleaned texts, *args) -> list of score dicts, in order
+        self.score_fn = score_fn
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.items = 0
+        self.size_counts = Counter()
+        self.wait_seconds = 0.0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Requests begun but not yet submitted or ended; only these are worth waiting for
+        self._expected = 0
+        self._request = threading.local()
+
+    @property
+    def enabled(self):
+        return self.max_wait > 0 and self.max_batch_size > 1
+
+    def _ensure_collector(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                # After a fork the parent's thread and queue are gone
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._collect, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def begin_request(self):
+        """Mark the calling thread's request as one that may submit a text"""
+        if not getattr(self._request, 'expected', False):
+            self._request.expected = True
+            with self._lock:
+                self._expected += 1
+
+    def _settle(self):
+        """The calling thread's request will not submit (again); True if it was expected"""
+        if not getattr(self._request, 'expected', False):
+            return False
+        self._request.expected = False
+        with self._lock:
+            self._expected -= 1
+        return True
+
+    def end_request(self):
+        """Mark the calling thread's request finished, waking the collector if it was waiting for it"""
+        if self._settle() and self._pid == os.getpid():
+            self._queue.put(None)
+
+    def submit(self, cleaned_text, *args):
+        """Queue one text; returns a Future resolving to its score dict"""
+        self._ensure_collector()
+        future = Future()
+        self._settle()
+        self._queue.put((cleaned_text, args, future, time.monotonic()))
+        return future
+
+    def score(self, cleaned_texts, *args):
+        """Drop-in for score_fn: single texts are coalesced, lists are already a batch"""
+        if not self.enabled or len(cleaned_texts) != 1:
+            return self.score_fn(cleaned_texts, *args)
+        return [self.submit(cleaned_texts[0], *args).result()]
+
+    def _collect(self):
+        while True:
+            item = self._queue.get()
+            # None only wakes the collector to re-check who is still expected
+            if item is None:
+                continue
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                # Texts already queued are always taken; new ones are only waited for while expected
+                waiting = self._expected > 0 and remaining > 0
+                try:
+                    item = self._queue.get(timeout=remaining) if waiting else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    batch.append(item)
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for args, group in groups.items():
+                self._dispatch(group, args)
+
+    def _dispatch(self, batch, args):
+        started = time.monotonic()
+        try:
+            scores = self.score_fn([text for text, _, _, _ in batch], *args)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.size_counts[len(batch)] += 1
+            self.wait_seconds += sum(started - queued_at for _, _, _, queued_at in batch)
+        for (_, _, future, _), score in zip(batch, scores):
+            future.set_result(score)
+
+    def stats(self):
+        """Achieved batch sizes, bucketed by powers of two"""
+        with self._lock:
+            buckets = Counter()
+            for size, count in self.size_counts.items():
+                buckets[1 << (size - 1).bit_length()] += count
+            return {
+                'enabled': self.enabled,
+                'max_wait_ms': self.max_wait * 1000,
+                'max_batch_size': self.max_batch_size,
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'max_observed_batch_size': max(self.size_counts, default=0),
+                'mean_queue_wait_ms': round(self.wait_seconds / self.items * 1000, 3) if self.items else 0.0,
+                'batch_size_histogram': {f'le_{bound}': buckets[bound] for bound in sorted(buckets)},
+            }
@@ -0,0 +1,391 @@
+"""
+Fast-start model artifact format
+
+The four pickled objects (CountVectorizer, TfidfTransformer, LogisticRegression,
+MultinomialNB) are exported as plain NumPy arrays in one version directory:
+
+    manifest.json             format version, shapes, class labels, tokenizer config
+    vocab_hash.npy            sorted 64-bit hashes of the vocabulary terms
+    vocab_index.npy           feature column of each entry in vocab_hash
+    idf.npy                   TF-IDF idf_ vector
+    lr_coef.npy               logistic regression coef_ (binary, so one row)
+    lr_intercept.npy          logistic regression intercept_
+    nb_feature_log_prob.npy   naive Bayes feature_log_prob_
+    nb_class_log_prior.npy    naive Bayes class_log_prior_
+    kernel_table.npy          linear_kernel.weight_table() of the arrays above,
+                              so scoring processes map it instead of building it
+    metrics.json              optional; evaluation metrics, corpus size, timings
+                              and latency recorded by train_models.py
+
+Every save writes a new version directory (models/bundle/v3/) and then
+atomically replaces the bundle's CURRENT file, which names the live version,
+so a concurrent load reads either the old set or the new one and never a
+mix. The previous version is kept for processes still loading it; older
+ones are removed. A directory holding manifest.json directly (the layout
+before versions) still loads.
+
+Loading memory-maps the arrays instead of unpickling a vocabulary dict, so a
+cold start is a few file opens and forked or sibling worker processes share
+the same page-cache pages.
+
+A bundle can also hold the hashed-feature model family (manifest
+"features": "hashed", exported from a HashingVectorizer). It has no
+vocabulary arrays at all: tokens map to columns by murmurhash3 modulo a fixed
+n_features, exactly like HashingVectorizer, so its size is fixed by
+n_features and does not grow with the corpus vocabulary. It is only smaller
+than a vocabulary bundle when the vocabulary is larger than the hashed
+width. The Bundle* classes expose the transform / predict_proba / classes_
+surface the endpoints and scoring.py use, so they drop in for the sklearn
+objects.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit, logsumexp
+
+from linear_kernel import weight_table
+
+BUNDLE_DIR = 'models/bundle'
+HASHED_BUNDLE_DIR = 'models/hashed_bundle'
+FORMAT_VERSION = 1
+
+# Training report stored next to the arrays; not needed to score
+METRICS_FILE = 'metrics.json'
+
+# Names the live version subdirectory of a bundle directory
+CURRENT_FILE = 'CURRENT'
+_VERSION_DIR = re.compile(r'v(\d+)$')
+
+# Values of manifest['features']
+FEATURES_VOCABULARY = 'vocabulary'
+FEATURES_HASHED = 'hashed'
+
+# Per-process memo of token -> feature column; hashing dominates tokenization otherwise
+TOKEN_CACHE_SIZE = 1 << 16
+
+_VOCABULARY_ARRAYS = ('vocab_hash', 'vocab_index')
+_MODEL_ARRAYS = ('idf', 'lr_coef', 'lr_intercept', 'nb_feature_log_prob', 'nb_class_log_prior')
+# Loaded when present; bundles exported before it existed build the table in memory
+KERNEL_TABLE = 'kernel_table'
+
+
+def token_hash(token):
+    """Stable 64-bit hash of a vocabulary term"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _is_hashing(vectorizer):
+    return not hasattr(vectorizer, 'vocabulary_') and hasattr(vectorizer, 'n_features')
+
+
+def _check_exportable(vectorizer, tfidf_transformer, model_lr, model_nb):
+    """Reject configurations the bundle classes do not reproduce exactly"""
+    if (vectorizer.analyzer != 'word' or vectorizer.ngram_range != (1, 1)
+            or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None
+            or vectorizer.strip_accents is not None or vectorizer.binary):
+        raise ValueError('Only word unigram vectorizers with the default tokenizer can be bundled')
+    if _is_hashing(vectorizer) and (vectorizer.alternate_sign or vectorizer.norm is not None):
+        raise ValueError('Only HashingVectorizers with alternate_sign=False and norm=None can be bundled')
+    if tfidf_transformer.norm != 'l2' or tfidf_transformer.sublinear_tf or not tfidf_transformer.use_idf:
+        raise ValueError('Only l2-normalized, idf-weighted, linear-tf TfidfTransformers can be bundled')
+    if len(model_lr.classes_) != 2 or len(model_nb.classes_) != 2:
+        raise ValueError('Only binary classifiers can be bundled')
+
+
+def save_bundle(vectorizer, tfidf_transformer, model_lr, model_nb, directory=BUNDLE_DIR):
+    """Export fitted sklearn objects to the bundle format"""
+    _check_exportable(vectorizer, tfidf_transformer, model_lr, model_nb)
+
+    arrays = {
+        'idf': np.asarray(tfidf_transformer.idf_, dtype=np.float64),
+        'lr_coef': np.asarray(model_lr.coef_[0], dtype=np.float64),
+        'lr_intercept': np.asarray(model_lr.intercept_, dtype=np.float64),
+        'nb_feature_log_prob': np.asarray(model_nb.feature_log_prob_, dtype=np.float64),
+        'nb_class_log_prior': np.asarray(model_nb.class_log_prior_, dtype=np.float64),
+    }
+    arrays[KERNEL_TABLE] = weight_table(arrays['idf'], arrays['lr_coef'], arrays['nb_feature_log_prob'])
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'token_pattern': vectorizer.token_pattern,
+        'lowercase': bool(vectorizer.lowercase),
+        'lr_classes': model_lr.classes_.tolist(),
+        'nb_classes': model_nb.classes_.tolist(),
+    }
+
+    if _is_hashing(vectorizer):
+        manifest['features'] = FEATURES_HASHED
+        manifest['n_features'] = int(vectorizer.n_features)
+        manifest['stop_words'] = sorted(vectorizer.get_stop_words() or [])
+    else:
+        terms = vectorizer.vocabulary_
+        hashes = np.fromiter((token_hash(term) for term in terms), dtype=np.uint64, count=len(terms))
+        columns = np.fromiter(terms.values(), dtype=np.int32, count=len(terms))
+        order = np.argsort(hashes)
+        hashes, columns = hashes[order], columns[order]
+        if np.any(hashes[1:] == hashes[:-1]):
+            raise ValueError('Vocabulary hash collision; cannot export bundle')
+        arrays['vocab_hash'] = hashes
+        arrays['vocab_index'] = columns
+        manifest['features'] = FEATURES_VOCABULARY
+        manifest['n_features'] = len(terms)
+
+    # A fresh version directory, so nothing a running server may have memory-mapped is touched
+    os.makedirs(directory, exist_ok=True)
+    version = _new_version_dir(directory)
+    path = os.path.join(directory, version)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    previous = _current_version(directory)
+    # The switch: one rename makes the complete new set live
+    pointer = os.path.join(directory, CURRENT_FILE)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(version + '\n')
+    os.replace(pointer + '.tmp', pointer)
+    _prune_versions(directory, keep={version, previous})
+
+
+def _version_dirs(directory):
+    return [name for name in os.listdir(directory)
+            if _VERSION_DIR.match(name) and os.path.isdir(os.path.join(directory, name))]
+
+
+def _new_version_dir(directory):
+    """Create and return the next unused version subdirectory name"""
+    number = max((int(_VERSION_DIR.match(name).group(1)) for name in _version_dirs(directory)), default=0)
+    while True:
+        number += 1
+        try:
+            os.mkdir(os.path.join(directory, f'v{number}'))
+            return f'v{number}'
+        except FileExistsError:
+            continue
+
+
+def _current_version(directory):
+    """Version subdirectory CURRENT names, or None for a flat or missing bundle"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_versions(directory, keep):
+    """Best-effort removal of superseded versions and of files left by the flat layout"""
+    stale = [os.path.join(directory, name) for name in _version_dirs(directory) if name not in keep]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+    for name in os.listdir(directory):
+        if name.endswith('.npy') or name in ('manifest.json', METRICS_FILE):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def bundle_path(directory=BUNDLE_DIR):
+    """Directory holding the live version's files: the subdirectory CURRENT names, else directory itself"""
+    version = _current_version(directory)
+    return os.path.join(directory, version) if version else directory
+
+
+def bundle_exists(directory=BUNDLE_DIR):
+    return os.path.exists(os.path.join(bundle_path(directory), 'manifest.json'))
+
+
+def save_metrics(report, directory=BUNDLE_DIR):
+    """Write the training report (a JSON-serializable dict) into a bundle's live version"""
+    path = os.path.join(bundle_path(directory), METRICS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def load_metrics(directory=BUNDLE_DIR):
+    """The bundle's training report, or None when it has none or it cannot be read"""
+    try:
+        with open(os.path.join(bundle_path(directory), METRICS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class Bundle:
+    """Memory-mapped arrays and manifest of one exported model set"""
+
+    def __init__(self, manifest, arrays, directory=None):
+        self.manifest = manifest
+        # Version directory the arrays were read from
+        self.directory = directory
+        self.kernel_table = None
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.features = manifest.get('features', FEATURES_VOCABULARY)
+        self.n_features = manifest['n_features']
+        self.token_pattern = re.compile(manifest['token_pattern'])
+        self.lowercase = manifest['lowercase']
+        if self.features == FEATURES_HASHED:
+            from sklearn.utils import murmurhash3_32
+            self._murmurhash = murmurhash3_32
+            self.stop_words = frozenset(manifest['stop_words'])
+            lookup = self._hashed_column
+        else:
+            lookup = self._lookup_column
+        self.column_of = lru_cache(maxsize=TOKEN_CACHE_SIZE)(lookup)
+
+    def _hashed_column(self, token):
+        """Column HashingVectorizer(alternate_sign=False) assigns a token; -1 for stop words"""
+        if token in self.stop_words:
+            return -1
+        return abs(self._murmurhash(token, seed=0)) % self.n_features
+
+    def _lookup_column(self, token):
+        """Feature column of a token, or -1 when it is not in the vocabulary"""
+        token_key = np.uint64(token_hash(token))
+        slot = int(np.searchsorted(self.vocab_hash, token_key))
+        if slot < len(self.vocab_hash) and self.vocab_hash[slot] == token_key:
+            return int(self.vocab_index[slot])
+        return -1
+
+    def token_counts(self, document):
+        """Map one document to (sorted feature columns, counts)"""
+        if self.lowercase:
+            document = document.lower()
+        column_of = self.column_of
+        counts = Counter(self.token_pattern.findall(document))
+        pairs = sorted((column_of(token), count) for token, count in counts.items())
+        # Out-of-vocabulary tokens map to -1 and sort first
+        pairs = [pair for pair in pairs if pair[0] >= 0]
+        columns = np.fromiter((column for column, _ in pairs), dtype=np.int32, count=len(pairs))
+        counts = np.fromiter((count for _, count in pairs), dtype=np.int64, count=len(pairs))
+        # Distinct tokens can share a hashed column; HashingVectorizer sums them
+        if self.features == FEATURES_HASHED and np.any(columns[1:] == columns[:-1]):
+            columns, inverse = np.unique(columns, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        return columns, counts
+
+    def token_terms(self, document):
+        """Map one document to (distinct known tokens, their feature columns, counts)"""
+        if self.lowercase:
+            document = document.lower()
+        column_of = self.column_of
+        terms, columns, counts = [], [], []
+        for token, count in Counter(self.token_pattern.findall(document)).items():
+            column = column_of(token)
+            if column >= 0:
+                terms.append(token)
+                columns.append(column)
+                counts.append(count)
+        return terms, np.asarray(columns, dtype=np.intp), np.asarray(counts, dtype=np.int64)
+
+
+def load_bundle(directory=BUNDLE_DIR, mmap=True):
+    """Load a bundle's live version; arrays are memory-mapped read-only unless mmap is False"""
+    # Resolved once, so every file below comes from the same version
+    directory = bundle_path(directory)
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version {manifest.get('format_version')}")
+    names = _MODEL_ARRAYS
+    if manifest.get('features', FEATURES_VOCABULARY) == FEATURES_VOCABULARY:
+        names += _VOCABULARY_ARRAYS
+    if os.path.exists(os.path.join(directory, f'{KERNEL_TABLE}.npy')):
+        names += (KERNEL_TABLE,)
+    arrays = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+        for name in names
+    }
+    return Bundle(manifest, arrays, directory)
+
+
+class BundleVectorizer:
+    """CountVectorizer/HashingVectorizer.transform backed by the bundle"""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def transform(self, raw_documents):
+        indptr = [0]
+        columns, counts = [], []
+        for document in raw_documents:
+            doc_columns, doc_counts = self.bundle.token_counts(document)
+            columns.append(doc_columns)
+            counts.append(doc_counts)
+            indptr.append(indptr[-1] + len(doc_columns))
+        return sparse.csr_matrix(
+            (np.concatenate(counts) if counts else np.empty(0, dtype=np.int64),
+             np.concatenate(columns) if columns else np.empty(0, dtype=np.int32),
+             np.asarray(indptr)),
+            shape=(len(indptr) - 1, self.bundle.n_features),
+        )
+
+
+class BundleTfidf:
+    """TfidfTransformer.transform (idf weighting then l2 row normalization)"""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def transform(self, counts):
+        weighted = counts.astype(np.float64)
+        weighted.data *= self.bundle.idf[weighted.indices]
+        row_norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        row_norms[row_norms == 0.0] = 1.0
+        weighted.data /= np.repeat(row_norms, np.diff(weighted.indptr))
+        return weighted
+
+
+class BundleLogisticRegression:
+    """Binary LogisticRegression.predict_proba from coef/intercept"""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.classes_ = np.asarray(bundle.manifest['lr_classes'])
+
+    def predict_proba(self, X):
+        prob = expit(X @ self.bundle.lr_coef + self.bundle.lr_intercept[0])
+        return np.stack([1 - prob, prob], axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class BundleMultinomialNB:
+    """MultinomialNB.predict_proba from feature/class log-probabilities"""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.classes_ = np.asarray(bundle.manifest['nb_classes'])
+
+    def predict_proba(self, X):
+        jll = np.asarray(X @ self.bundle.nb_feature_log_prob.T) + self.bundle.nb_class_log_prior
+        return np.exp(jll - logsumexp(jll, axis=1, keepdims=True))
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def load_pipeline(directory=BUNDLE_DIR, mmap=True):
+    """Return (model_lr, model_nb, vectorizer, tfidf_transformer) drop-ins for a bundle"""
+    bundle = load_bundle(directory, mmap=mmap)
+    return (BundleLogisticRegression(bundle), BundleMultinomialNB(bundle),
+            BundleVectorizer(bundle), BundleTfidf(bundle))
+
+
+if __name__ == '__main__':
+    # Convert existing pickled models into a bundle without retraining
+    import joblib
+
+    save_bundle(joblib.load('models/vectorizer.pkl'), joblib.load('models/tfidf.pkl'),
+                joblib.load('models/logreg_model.pkl'), joblib.load('models/naive_bayes_model.pkl'))
+    print(f"✓ Exported model bundle to {BUNDLE_DIR}/")
@@ -0,0 +1,303 @@
+"""
+Versioned, hot-swappable model sets
+
+A ModelSet bundles everything needed to score text (the four pipeline
+objects and the collapsed kernel) and is never mutated after it is built.
+ModelRegistry.current holds exactly one ModelSet reference; a request reads
+it once and scores with that object, so a reload only has to build and
+validate the next set off to the side and then rebind that one attribute.
+Requests already running keep the set they started with, and no request
+ever sees a mix of old and new artifacts.
+
+Reloads are triggered explicitly (reload(), the admin endpoint) or by a
+watcher thread polling the artifact files for changes. A candidate must
+score the canary reviews with sane probabilities before it replaces the
+live set; if it does not, the old set keeps serving.
+"""
+import math
+import os
+import threading
+import time
+
+import joblib
+
+from linear_kernel import LinearKernel
+from model_bundle import BUNDLE_DIR, FEATURES_HASHED, FEATURES_VOCABULARY, HASHED_BUNDLE_DIR
+from model_bundle import CURRENT_FILE, METRICS_FILE, bundle_exists, bundle_path, load_bundle, load_metrics
+from model_bundle import BundleLogisticRegression, BundleMultinomialNB, BundleTfidf, BundleVectorizer
+from scoring import score_texts, score_with_kernel
+from text_normalizer import clean_texts
+
+PICKLE_FILES = ('logreg_model.pkl', 'naive_bayes_model.pkl', 'vectorizer.pkl', 'tfidf.pkl')
+
+# Touched by request_reload() so watchers in sibling worker processes reload too
+RELOAD_STAMP = '.reload'
+
+# Reviews with an unambiguous label; candidates must get most of them right
+CANARY_REVIEWS = [
+    ('One of the best films I have ever seen, brilliant acting and a wonderful story.', 'positive'),
+    ('An absolute masterpiece. I loved every minute and would watch it again.', 'positive'),
+    ('Great performances, beautiful music and an excellent, moving ending.', 'positive'),
+    ('Fantastic movie, highly recommended to everyone.', 'positive'),
+    ('The worst movie I have ever seen. Boring, stupid and a total waste of time.', 'negative'),
+    ('Terrible acting, awful script and a predictable, pointless plot.', 'negative'),
+    ('I hated it. Dull, poorly made and far too long.', 'negative'),
+    ('Horrible film, do not waste your money on this mess.', 'negative'),
+]
+
+# Share of canary reviews each model must label correctly to replace a live set
+CANARY_MIN_ACCURACY = 0.75
+
+
+class ModelSet:
+    """One immutable, fully loaded version of the scoring models"""
+
+    __slots__ = ('version', 'variant', 'source', 'loaded_at', 'metrics',
+                 'model_lr', 'model_nb', 'vectorizer', 'tfidf_transformer', 'kernel')
+
+    def __init__(self, model_lr, model_nb, vectorizer, tfidf_transformer, kernel=None,
+                 variant=FEATURES_VOCABULARY, source=None, metrics=None):
+        self.model_lr = model_lr
+        self.model_nb = model_nb
+        self.vectorizer = vectorizer
+        self.tfidf_transformer = tfidf_transformer
+        self.kernel = kernel
+        self.variant = variant
+        self.source = source
+        # Training report (model_bundle.METRICS_FILE) of these exact artifacts, or None
+        self.metrics = metrics
+        self.loaded_at = time.time()
+        # Assigned by the registry when the set goes live
+        self.version = None
+
+    def score(self, cleaned_texts):
+        """Score cleaned texts with both models, via the collapsed kernel when available"""
+        if self.kernel is not None:
+            return score_with_kernel(cleaned_texts, self.kernel)
+        return score_texts(cleaned_texts, self.vectorizer, self.tfidf_transformer, self.model_lr, self.model_nb)
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'variant': self.variant,
+            'source': self.source,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.loaded_at)),
+            'metrics': self.metrics,
+        }
+
+
+def bundle_dir_for(models_dir, variant):
+    """Bundle directory for a model variant, e.g. models/hashed_bundle"""
+    default = HASHED_BUNDLE_DIR if variant == FEATURES_HASHED else BUNDLE_DIR
+    return os.path.join(models_dir, os.path.basename(default))
+
+
+def artifact_fingerprint(models_dir='models', variant=FEATURES_VOCABULARY):
+    """(path, mtime, size) of every file load_model_set() could read; changes when artifacts do"""
+    paths = [os.path.join(models_dir, name) for name in PICKLE_FILES + (RELOAD_STAMP,)]
+    for directory in {bundle_dir_for(models_dir, FEATURES_VOCABULARY), bundle_dir_for(models_dir, variant)}:
+        # CURRENT switches on every save, and the live version's files carry its metrics
+        live = bundle_path(directory)
+        paths += [os.path.join(directory, CURRENT_FILE), os.path.join(live, 'manifest.json'),
+                  os.path.join(live, METRICS_FILE)]
+    fingerprint = []
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def _entry(fingerprint, path):
+    return next((entry for entry in fingerprint if entry[0] == path), None)
+
+
+def load_model_set(models_dir='models', variant=FEATURES_VOCABULARY):
+    """Load the newest artifacts: the variant's bundle, else the vocabulary bundle, else the pickles
+
+    Returns None when no complete artifact set exists.
+    """
+    directories = [bundle_dir_for(models_dir, variant)]
+    if variant != FEATURES_VOCABULARY:
+        directories.append(bundle_dir_for(models_dir, FEATURES_VOCABULARY))
+    for directory in directories:
+        # Prefer the memory-mapped bundle: no unpickling, pages shared across workers
+        if bundle_exists(directory):
+            bundle = load_bundle(directory)
+            return ModelSet(
+                BundleLogisticRegression(bundle), BundleMultinomialNB(bundle),
+                BundleVectorizer(bundle), BundleTfidf(bundle), LinearKernel.from_bundle(bundle),
+                variant=bundle.features, source=directory, metrics=load_metrics(bundle.directory)
+            )
+
+    paths = [os.path.join(models_dir, name) for name in PICKLE_FILES]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    model_lr, model_nb, vectorizer, tfidf_transformer = (joblib.load(path) for path in paths)
+    return ModelSet(
+        model_lr, model_nb, vectorizer, tfidf_transformer,
+        LinearKernel.from_sklearn(vectorizer, tfidf_transformer, model_lr, model_nb),
+        source=models_dir
+    )
+
+
+def canary_check(model_set, canary=CANARY_REVIEWS):
+    """Score the canary reviews; returns (usable, accuracy per model, error message or None)"""
+    try:
+        scores = model_set.score(clean_texts([text for text, _ in canary]))
+    except Exception as e:
+        return False, {}, f'canary scoring failed: {e}'
+    if len(scores) != len(canary):
+        return False, {}, 'canary scoring returned the wrong number of results'
+    for score in scores:
+        for prefix in ('lr', 'nb'):
+            prob = score[f'{prefix}_prob']
+            if not (math.isfinite(prob) and 0.0 <= prob <= 1.0):
+                return False, {}, f'{prefix} probability out of range: {prob}'
+            if score[f'{prefix}_sentiment'] not in ('positive', 'negative'):
+                return False, {}, f"unexpected {prefix} label {score[f'{prefix}_sentiment']!r}"
+    accuracy = {
+        prefix: sum(score[f'{prefix}_sentiment'] == label for score, (_, label) in zip(scores, canary)) / len(canary)
+        for prefix in ('lr', 'nb')
+    }
+    return True, accuracy, None
+
+
+class ModelRegistry:
+    """Holds the live ModelSet and swaps in validated replacements"""
+
+    def __init__(self, models_dir='models', variant=FEATURES_VOCABULARY, on_swap=None):
+        self.models_dir = models_dir
+        self.variant = variant
+        # Called with the new ModelSet after every swap (cache and aggregate invalidation)
+        self.on_swap = on_swap
+        self.current = None
+        self.last_reload = None
+        # Artifact state the last reload acted on, so unchanged or broken files are not reloaded again
+        self.fingerprint = None
+        self._versions = 0
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._watch_lock = threading.Lock()
+
+    def install(self, model_set, require_canary=None):
+        """Validate a ModelSet and make it live; returns a status dict
+
+        require_canary defaults to True when a set is already live: a
+        candidate that misses the canary accuracy bar never replaces working
+        models, but is accepted (with a warning) when there is nothing to
+        fall back to.
+        """
+        if require_canary is None:
+            require_canary = self.current is not None
+        usable, accuracy, error = canary_check(model_set)
+        result = {'canary_accuracy': accuracy}
+        if not usable:
+            return {**result, 'status': 'rejected', 'reason': error}
+        weak = [prefix for prefix, value in accuracy.items() if value < CANARY_MIN_ACCURACY]
+        if weak and require_canary:
+            return {**result, 'status': 'rejected',
+                    'reason': f"canary accuracy below {CANARY_MIN_ACCURACY} for {', '.join(weak)}"}
+        if weak:
+            print(f"ℹ Canary accuracy below {CANARY_MIN_ACCURACY} for {', '.join(weak)}; "
+                  "serving these models since none are loaded")
+
+        previous = self.current
+        self._versions += 1
+        model_set.version = self._versions
+        # The swap: one reference rebind, atomic under the GIL
+        self.current = model_set
+        if self.on_swap is not None:
+            self.on_swap(model_set)
+        return {**result, 'status': 'reloaded', 'version': model_set.version,
+                'previous_version': previous.version if previous is not None else None}
+
+    def reload(self, force=False):
+        """Load and install the artifacts on disk unless they are unchanged; returns a status dict"""
+        with self._reload_lock:
+            started = time.perf_counter()
+            fingerprint = artifact_fingerprint(self.models_dir, self.variant)
+            if not force and self.current is not None and fingerprint == self.fingerprint:
+                result = {'status': 'unchanged', 'version': self.current.version}
+            else:
+                self.fingerprint = fingerprint
+                try:
+                    candidate = load_model_set(self.models_dir, self.variant)
+                except Exception as e:
+                    result = {'status': 'failed', 'reason': f'loading failed: {e}'}
+                else:
+                    if candidate is None:
+                        result = {'status': 'failed', 'reason': f'no trained models in {self.models_dir}/'}
+                    else:
+                        result = self.install(candidate)
+                        result['source'] = candidate.source
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            self.last_reload = {**result, 'at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}
+            return result
+
+    def request_reload(self):
+        """Reload here and stamp the models directory so other processes' watchers follow
+
+        The result's 'stamp_followed' says whether watchers are running, judged
+        by this process's own; without them sibling workers keep their models.
+        """
+        result = self.reload(force=True)
+        result['stamp_followed'] = self.follows_stamp
+        if result['status'] == 'reloaded':
+            os.makedirs(self.models_dir, exist_ok=True)
+            stamp = os.path.join(self.models_dir, RELOAD_STAMP)
+            with open(stamp, 'w') as f:
+                f.write(str(time.time()))
+            # Our own watcher should not reload a second time for our stamp
+            self.fingerprint = artifact_fingerprint(self.models_dir, self.variant)
+        return result
+
+    def watch(self, interval, stamp_interval=0):
+        """Start (once per process) a thread reloading when the artifacts change
+
+        interval polls every artifact file. When it is 0, stamp_interval still
+        polls RELOAD_STAMP alone, so a request_reload() in a sibling process
+        is followed without reloading on every artifact write.
+        """
+        if interval <= 0 and stamp_interval <= 0:
+            return
+        if self._watcher is not None and self._watcher_pid == os.getpid():
+            return
+        with self._watch_lock:
+            if self._watcher is None or self._watcher_pid != os.getpid():
+                self._watcher_pid = os.getpid()
+                args = (interval, False) if interval > 0 else (stamp_interval, True)
+                self._watcher = threading.Thread(target=self._watch, args=args,
+                                                 name='model-watcher', daemon=True)
+                self._watcher.start()
+
+    def _watch(self, interval, stamp_only=False):
+        stamp = os.path.join(self.models_dir, RELOAD_STAMP)
+        while True:
+            time.sleep(interval)
+            fingerprint = artifact_fingerprint(self.models_dir, self.variant)
+            if stamp_only:
+                if _entry(fingerprint, stamp) == _entry(self.fingerprint or (), stamp):
+                    continue
+            elif fingerprint == self.fingerprint:
+                continue
+            # Let a writer finish the remaining files before loading
+            time.sleep(min(interval, 1.0))
+            result = self.reload()
+            if result['status'] != 'unchanged':
+                print(f"Model reload ({result['status']}): {result.get('reason') or result.get('version')}")
+
+    @property
+    def follows_stamp(self):
+        """Whether this process's watcher picks up reloads requested in other processes"""
+        return self._watcher is not None and self._watcher_pid == os.getpid() and self._watcher.is_alive()
+
+    def stats(self):
+        current = self.current
+        return {
+            'current': current.describe() if current is not None else None,
+            'last_reload': self.last_reload,
+        }
@@ -0,0 +1,92 @@
+"""
+In-process LRU cache of model scores keyed on normalized text
+
+Keys are the version of the models that produced a score plus a 128-bit
+blake2b digest of the clean_text output, so retries, repeated quotes and
+the stored reviews re-scored by /api/search skip the models entirely.
+Because the version is part of the key, a request that started on the
+previous models and stores its scores after a reload can never serve
+them to requests on the new ones. Size is bounded with least-recently-used
+eviction and entries can optionally expire after a TTL. The cache should
+still be cleared when the models change, to free the old entries.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(cleaned_text, version=None):
+    """Model version and digest of a clean_text output"""
+    return version, hashlib.blake2b(cleaned_text.encode('utf-8'), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Thread-safe LRU map of cache_key -> score dict, with optional TTL"""
+
+    def __init__(self, max_size=10000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        """Return the cached score for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                score, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return score
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, score):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (score, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry (call after models are loaded or retrained)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def score(self, cleaned_texts, score_fn, version=None):
+        """Score texts with the models of the given version, calling score_fn only on the ones not already cached"""
+        if not self.enabled:
+            return score_fn(cleaned_texts)
+
+        keys = [cache_key(text, version) for text in cleaned_texts]
+        scores = [self.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = score_fn([cleaned_texts[i] for i in missing])
+            for i, score in zip(missing, fresh):
+                scores[i] = score
+                self.put(keys[i], score)
+        return scores
@@ -0,0 +1,119 @@
+"""
+Response encodings and payload trimming for high-volume clients
+
+Prediction endpoints choose an encoding from the Accept header:
+
+    application/json                 default
+    application/msgpack              same structure as JSON, MessagePack-encoded
+                                     (needs the optional msgpack package)
+    application/vnd.sentiment.scores fixed-layout binary, predictions only
+
+The binary layout is little-endian. A header is followed by one record per
+scored text, in request order:
+
+    header  4s magic b'SENT', uint16 format version, uint32 record count
+    record  uint8 LR label, float32 LR probability,
+            uint8 NB label, float32 NB probability          (10 bytes)
+
+Labels are 1 for positive and 0 for negative. Probabilities are the
+confidence of that label, the same numbers JSON reports as 'probability'.
+
+The fields option limits which parts of a prediction are built at all, so
+trimmed responses also cost less to produce. gzip_body compresses bodies
+above a size threshold for clients that accept gzip.
+"""
+import gzip
+import struct
+
+try:
+    import msgpack
+except ImportError:  # optional; MessagePack is simply not offered without it
+    msgpack = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+# Older clients ask for MessagePack under this name
+MSGPACK_ALIAS = 'application/x-msgpack'
+SCORES = 'application/vnd.sentiment.scores'
+
+BINARY_MAGIC = b'SENT'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sHI')
+_RECORD = struct.Struct('<BfBf')
+
+# Parts of a prediction a client can ask for; verbose=false keeps only the scores
+FIELDS = frozenset(['input_text', 'prediction', 'probability', 'metrics'])
+COMPACT_FIELDS = frozenset(['prediction', 'probability'])
+
+# Bodies smaller than this are sent uncompressed; gzip would save little and cost a pass
+GZIP_MIN_BYTES = 4096
+GZIP_LEVEL = 5
+
+
+def offered_types(binary=False):
+    """Media types an endpoint can produce, JSON first so it wins ties"""
+    types = [JSON]
+    if msgpack is not None:
+        types += [MSGPACK, MSGPACK_ALIAS]
+    if binary:
+        types.append(SCORES)
+    return types
+
+
+def negotiate(accept_mimetypes, binary=False):
+    """Media type to answer with for a werkzeug MIMEAccept; JSON unless the client prefers another"""
+    match = accept_mimetypes.best_match(offered_types(binary)) if accept_mimetypes else None
+    if match == MSGPACK_ALIAS:
+        return MSGPACK
+    return match or JSON
+
+
+def parse_fields(fields=None, verbose=None):
+    """Set of FIELDS to include; raises ValueError on an unknown field
+
+    fields is a list or a comma-separated string; verbose=False (or the
+    strings 'false'/'0') means COMPACT_FIELDS.
+    """
+    selected = FIELDS
+    if isinstance(verbose, str):
+        verbose = verbose.lower() not in ('false', '0', 'no')
+    if verbose is False:
+        selected = COMPACT_FIELDS
+    if fields:
+        names = fields.split(',') if isinstance(fields, str) else fields
+        requested = frozenset(str(name).strip() for name in names if str(name).strip())
+        unknown = requested - FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (choose from {', '.join(sorted(FIELDS))})")
+        selected = selected & requested
+    return selected
+
+
+def encode_msgpack(payload):
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def encode_scores(scores):
+    """Fixed-layout binary for a list of score dicts (lr_sentiment, lr_prob, nb_sentiment, nb_prob)"""
+    parts = [_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(scores))]
+    for score in scores:
+        parts.append(_RECORD.pack(score['lr_sentiment'] == 'positive', score['lr_prob'],
+                                  score['nb_sentiment'] == 'positive', score['nb_prob']))
+    return b''.join(parts)
+
+
+def decode_scores(data):
+    """Inverse of encode_scores: list of (lr_positive, lr_prob, nb_positive, nb_prob)"""
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError('Not a version 1 sentiment scores payload')
+    records = data[_HEADER.size:_HEADER.size + count * _RECORD.size]
+    return [(bool(lr_label), lr_prob, bool(nb_label), nb_prob)
+            for lr_label, lr_prob, nb_label, nb_prob in _RECORD.iter_unpack(records)]
+
+
+def gzip_body(body, accept_encoding, min_bytes=GZIP_MIN_BYTES):
+    """Compressed body when the client accepts gzip and it is large enough, else None"""
+    if len(body) < min_bytes or not accept_encoding or accept_encoding['gzip'] <= 0:
+        return None
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
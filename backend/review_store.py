@@ -0,0 +1,359 @@
+"""
+Movie review corpus with precomputed per-movie sentiment aggregates
+
+Reviews live in a local SQLite file (created from seed_reviews.json on first
+use). At load time every review is scored once in chunks and folded into
+per-movie counters, so /api/search is a title-index lookup plus
+serialization instead of re-classifying each review on every request.
+Aggregates depend on the models, so the store is invalidated and rebuilt
+when models are (re)loaded.
+
+New reviews are ingested with add_reviews(): they are scored in
+micro-batches, appended to the database and folded into the running
+counters, so the cost per review is O(1) and a movie's history is never
+re-scanned. Each store remembers the last row id it folded, and find()
+first folds rows appended since then, so reviews ingested by another
+worker process (or imported with import_rows) show up on the next search
+at O(new rows).
+"""
+import bisect
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+REVIEWS_DB = 'data/reviews.db'
+# Shipped with the code, so resolved next to this module rather than the working directory
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seed_reviews.json')
+
+# Reviews scored per model call while building aggregates
+SCORE_CHUNK_SIZE = 1000
+
+# Scored reviews kept per movie for the search response
+SAMPLE_SIZE = 3
+
+# Sorts after every character a normalized title can contain
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize_title(title):
+    """Case- and whitespace-insensitive title key"""
+    return ' '.join(str(title).lower().split())
+
+
+class MovieAggregate:
+    """Running sentiment counters for one movie"""
+
+    __slots__ = ('title', 'reviews', 'lr_positive', 'nb_positive',
+                 'lr_prob_sum', 'nb_prob_sum', 'samples')
+
+    def __init__(self, title):
+        self.title = title
+        self.reviews = 0
+        self.lr_positive = 0
+        self.nb_positive = 0
+        self.lr_prob_sum = 0.0
+        self.nb_prob_sum = 0.0
+        self.samples = []
+
+    def add(self, review, score):
+        """Fold one scored review into the counters"""
+        self.reviews += 1
+        self.lr_positive += score['lr_sentiment'] == 'positive'
+        self.nb_positive += score['nb_sentiment'] == 'positive'
+        self.lr_prob_sum += score['lr_prob']
+        self.nb_prob_sum += score['nb_prob']
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append({'review': review, **score})
+
+    def snapshot(self):
+        """Copy of the counters, consistent as of one point in time"""
+        copy = MovieAggregate(self.title)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        copy.samples = list(self.samples)
+        return copy
+
+
+class TitleIndex:
+    """Title lookup replacing the linear substring scan
+
+    Resolves, in order: an exact title; a title spelled out as whole words
+    inside the query ("inception review"); the query as a prefix of a title
+    starting at any word boundary ("dark kni" -> "the dark knight"). Ties go
+    to the title added first.
+
+    The titles passed to the constructor are indexed with one sort. Prefix
+    matches form a contiguous run of the sorted suffixes, and the earliest
+    title in that run comes from per-block minima of the insertion order, so
+    even a one-letter query reads O(BLOCK + matches / BLOCK) entries. Titles
+    add()ed later (ingestion) go to a small insort-maintained list instead.
+    """
+
+    # Sorted suffixes per precomputed insertion-order minimum
+    BLOCK = 256
+
+    def __init__(self, keys=()):
+        self._order = {}
+        # Title key of each insertion order
+        self._titles = []
+        # Words in the longest title; no longer span of a query can be a title
+        self._max_words = 0
+        suffixes = []
+        for key in keys:
+            if key not in self._order:
+                order = self._register(key)
+                suffixes.extend((suffix, order) for suffix in self._title_suffixes(key))
+        suffixes.sort()
+        # Sorted title suffixes starting at a word, and the insertion order of each
+        self._suffixes = [suffix for suffix, _ in suffixes]
+        self._orders = np.fromiter((order for _, order in suffixes), dtype=np.int64, count=len(suffixes))
+        full = len(suffixes) // self.BLOCK * self.BLOCK
+        self._block_min = self._orders[:full].reshape(-1, self.BLOCK).min(axis=1)
+        # Sorted (suffix, insertion order) of titles add()ed after construction
+        self._added = []
+
+    def __len__(self):
+        return len(self._order)
+
+    def _register(self, key):
+        order = len(self._titles)
+        self._order[key] = order
+        self._titles.append(key)
+        self._max_words = max(self._max_words, key.count(' ') + 1)
+        return order
+
+    @staticmethod
+    def _title_suffixes(key):
+        words = key.split(' ')
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    def add(self, key):
+        if key in self._order:
+            return
+        order = self._register(key)
+        for suffix in self._title_suffixes(key):
+            bisect.insort(self._added, (suffix, order))
+
+    def _earliest_with_prefix(self, query):
+        """Lowest insertion order among indexed suffixes starting with query, or None"""
+        lo = bisect.bisect_left(self._suffixes, query)
+        hi = bisect.bisect_left(self._suffixes, query + _MAX_CHAR, lo)
+        if lo < hi:
+            block = self.BLOCK
+            first_block, last_block = -(-lo // block), hi // block
+            if first_block >= last_block:
+                return int(self._orders[lo:hi].min())
+            best = self._block_min[first_block:last_block].min()
+            if lo < first_block * block:
+                best = min(best, self._orders[lo:first_block * block].min())
+            if last_block * block < hi:
+                best = min(best, self._orders[last_block * block:hi].min())
+            return int(best)
+        # Titles added later always rank after the constructor's, so they only matter without a match there
+        best = None
+        i = bisect.bisect_left(self._added, (query,))
+        while i < len(self._added) and self._added[i][0].startswith(query):
+            order = self._added[i][1]
+            if best is None or order < best:
+                best = order
+            i += 1
+        return best
+
+    def find(self, query):
+        query = normalize_title(query)
+        if not query:
+            return None
+        if query in self._order:
+            return query
+
+        # A known title written inside the query, longest span first; spans
+        # are capped at the longest title so the cost stays linear in the query
+        words = query.split(' ')
+        for length in range(min(len(words) - 1, self._max_words), 0, -1):
+            spans = [' '.join(words[i:i + length]) for i in range(len(words) - length + 1)]
+            found = [span for span in spans if span in self._order]
+            if found:
+                return min(found, key=self._order.get)
+
+        # The query as the start of a title or of a word inside one
+        order = self._earliest_with_prefix(query)
+        return self._titles[order] if order is not None else None
+
+
+class ReviewStore:
+    """SQLite-backed review corpus with in-memory aggregates and title index"""
+
+    def __init__(self, db_path=REVIEWS_DB, seed_path=SEED_PATH, score_fn=None):
+        self.db_path = db_path
+        self.seed_path = seed_path
+        # score_fn(list of raw reviews) -> list of score dicts (see scoring.py)
+        self.score_fn = score_fn
+        self.movies = {}
+        self.index = TitleIndex()
+        self._stale = True
+        self._loaded = False
+        # Highest row id already folded into the aggregates
+        self._last_id = 0
+        # Held while rebuilding or ingesting; reentrant so ingestion can trigger the first load
+        self._lock = threading.RLock()
+        # Guards the counters and index against torn reads during ingestion
+        self._update_lock = threading.Lock()
+
+    def _connect(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE IF NOT EXISTS reviews ('
+                     'id INTEGER PRIMARY KEY, movie TEXT NOT NULL, review TEXT NOT NULL)')
+        return conn
+
+    def _seed(self, conn):
+        """Populate an empty database from the bundled seed file"""
+        if conn.execute('SELECT 1 FROM reviews LIMIT 1').fetchone() or not os.path.exists(self.seed_path):
+            return
+        with open(self.seed_path, encoding='utf-8') as f:
+            seed = json.load(f)
+        conn.executemany('INSERT INTO reviews (movie, review) VALUES (?, ?)',
+                         [(movie, review) for movie, reviews in seed.items() for review in reviews])
+        conn.commit()
+
+    def import_rows(self, rows):
+        """Append (movie, review) rows to the database without touching the aggregates"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('INSERT INTO reviews (movie, review) VALUES (?, ?)', rows)
+        finally:
+            conn.close()
+
+    def load(self):
+        """Score every stored review once and rebuild aggregates and the title index"""
+        movies, last_id = {}, 0
+        conn = self._connect()
+        try:
+            self._seed(conn)
+            cursor = conn.execute('SELECT id, movie, review FROM reviews ORDER BY id')
+            while True:
+                rows = cursor.fetchmany(SCORE_CHUNK_SIZE)
+                if not rows:
+                    break
+                scores = self.score_fn([review for _, _, review in rows])
+                for (_, movie, review), score in zip(rows, scores):
+                    key = normalize_title(movie)
+                    if key not in movies:
+                        movies[key] = MovieAggregate(movie)
+                    movies[key].add(review, score)
+                last_id = rows[-1][0]
+        finally:
+            conn.close()
+        # Indexed in one sort, in first-seen order so ties still go to the earliest movie
+        index = TitleIndex(movies)
+        # Swap in complete structures so readers never see a partial build
+        with self._update_lock:
+            self.movies, self.index, self._last_id = movies, index, last_id
+        self._loaded = True
+        print(f"✓ Loaded reviews for {len(movies)} movies")
+
+    def _fold_new_rows(self, known_scores=None):
+        """Fold rows appended since the last fold, by any process, into the aggregates
+
+        known_scores maps row id -> score for rows this process just scored,
+        so its own ingestion is not scored twice. Callers hold self._lock.
+        """
+        known_scores = known_scores or {}
+        # load() already created the database, so skip _connect()'s setup on this per-search path
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute('SELECT id, movie, review FROM reviews WHERE id > ? ORDER BY id',
+                                  (self._last_id,))
+            while True:
+                rows = cursor.fetchmany(SCORE_CHUNK_SIZE)
+                if not rows:
+                    break
+                unscored = [review for row_id, _, review in rows if row_id not in known_scores]
+                scored = iter(self.score_fn(unscored) if unscored else ())
+                scores = [known_scores[row_id] if row_id in known_scores else next(scored)
+                          for row_id, _, _ in rows]
+                with self._update_lock:
+                    for (_, movie, review), score in zip(rows, scores):
+                        key = normalize_title(movie)
+                        if key not in self.movies:
+                            self.movies[key] = MovieAggregate(movie)
+                            self.index.add(key)
+                        self.movies[key].add(review, score)
+                    self._last_id = rows[-1][0]
+        finally:
+            conn.close()
+
+    def invalidate(self):
+        """Mark aggregates stale, e.g. after the models changed"""
+        self._stale = True
+
+    def ensure_loaded(self):
+        """Build on first use (callers wait) or rebuild when stale (callers keep the old data)"""
+        if self._stale or not self._loaded:
+            with self._lock:
+                if self._stale:
+                    self._stale = False
+                    try:
+                        self.load()
+                    except Exception:
+                        self._stale = True
+                        raise
+
+    def find(self, query):
+        """Return a snapshot of the MovieAggregate matching a search query, or None"""
+        self.ensure_loaded()
+        # Pick up reviews other workers ingested; if a fold is already running, serve what is folded
+        if self._lock.acquire(blocking=False):
+            try:
+                self._fold_new_rows()
+            finally:
+                self._lock.release()
+        with self._update_lock:
+            key = self.index.find(query)
+            return self.movies[key].snapshot() if key is not None else None
+
+    def _insert(self, title, reviews):
+        """Append one movie's reviews and return their row ids"""
+        conn = self._connect()
+        try:
+            with conn:
+                return [conn.execute('INSERT INTO reviews (movie, review) VALUES (?, ?)', (title, review)).lastrowid
+                        for review in reviews]
+        finally:
+            conn.close()
+
+    def add_reviews(self, title, reviews):
+        """Score, persist and fold new reviews into a movie's counters
+
+        Returns a snapshot of the updated MovieAggregate; the movie is
+        created (and indexed) if it is new.
+        """
+        key = normalize_title(title)
+        if not key:
+            raise ValueError('Movie title cannot be empty')
+        self.ensure_loaded()
+        with self._lock:
+            for start in range(0, len(reviews), SCORE_CHUNK_SIZE):
+                chunk = reviews[start:start + SCORE_CHUNK_SIZE]
+                scores = self.score_fn(chunk)
+                # Folded through the same id cursor as other workers' rows, so nothing is counted twice
+                self._fold_new_rows(dict(zip(self._insert(title, chunk), scores)))
+            with self._update_lock:
+                return self.movies[key].snapshot()
+
+if __name__ == '__main__':
+    # Bulk-import reviews: python review_store.py reviews.csv  (columns: movie,review)
+    import csv
+    import sys
+
+    store = ReviewStore()
+    with open(sys.argv[1], newline='', encoding='utf-8') as f:
+        rows = [(row['movie'], row['review']) for row in csv.DictReader(f)]
+    store.import_rows(rows)
+    print(f"✓ Imported {len(rows)} reviews into {store.db_path}")
@@ -0,0 +1,233 @@
+"""
+Streaming bulk scorer for large CSV / JSONL review dumps
+
+Reads the input in fixed-size chunks, scores each chunk in one vectorized
+pass through the same clean_text + LR/NB pipeline the API uses and writes
+results as it goes, so memory stays bounded regardless of input size.
+Chunks can be spread across a process pool; workers load the models once
+(the memory-mapped bundle is shared between them) and output order is
+preserved. A .json file holding one array of records is also accepted and
+decoded element by element, so it is read in bounded memory too.
+
+Usage:
+    python score_file.py reviews.csv -o scored.csv
+    python score_file.py dump.jsonl -o scored.jsonl --workers 0   # one per core
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from model_bundle import FEATURES_VOCABULARY
+from model_registry import load_model_set
+from scoring import score_with_kernel
+from text_normalizer import clean_texts
+
+OUTPUT_FIELDS = ['lr_sentiment', 'lr_prob', 'nb_sentiment', 'nb_prob']
+
+# Characters read per refill while decoding a JSON array
+JSON_READ_SIZE = 1 << 16
+
+# Set in each process by _init_worker
+_kernel = None
+
+
+def load_scoring_kernel():
+    """Load the models the same way the server does (see model_registry.load_model_set); None if there are none"""
+    model_set = load_model_set(variant=os.environ.get('MODEL_VARIANT', FEATURES_VOCABULARY))
+    return model_set.kernel if model_set is not None else None
+
+
+def _init_worker(kernel=None):
+    global _kernel
+    _kernel = kernel or load_scoring_kernel()
+
+
+def score_chunk(texts):
+    """Score one chunk of raw texts; returns one score dict per text"""
+    return score_with_kernel(clean_texts(texts), _kernel)
+
+
+def detect_format(path, explicit):
+    if explicit:
+        return explicit
+    path = path.lower()
+    if path.endswith('.json'):
+        return 'json'
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def _record_chunk(records, text_field, id_field, row):
+    ids = [record.get(id_field) for record in records] if id_field else list(range(row, row + len(records)))
+    return ids, [str(record.get(text_field, '')) for record in records]
+
+
+def iter_json_array(f, path):
+    """Yield the elements of the JSON array in text stream f without holding the whole array"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        block = f.read(JSON_READ_SIZE)
+        buffer, pos, eof = buffer[pos:] + block, 0, not block
+
+    def next_char():
+        """First non-whitespace character at or after pos (moving pos there), or '' at end of file"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            fill()
+
+    if next_char() != '[':
+        raise ValueError(f'{path}: expected a JSON array of records')
+    pos += 1
+    if next_char() == ']':
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # A number ending the buffer may continue in the next block
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            fill()
+            continue
+        yield value
+        pos = end
+        separator = next_char()
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"{path}: expected ',' or ']' between array elements")
+        next_char()
+
+
+def read_chunks(path, fmt, text_field, id_field, chunk_size):
+    """Yield (ids, texts) lists of at most chunk_size rows"""
+    if fmt == 'csv':
+        import pandas as pd
+        columns = [text_field] + ([id_field] if id_field else [])
+        row = 0
+        for frame in pd.read_csv(path, usecols=columns, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            ids = frame[id_field].tolist() if id_field else list(range(row, row + len(frame)))
+            row += len(frame)
+            yield ids, frame[text_field].tolist()
+    elif fmt == 'json':
+        with open(path, encoding='utf-8') as f:
+            records = iter_json_array(f, path)
+            row = 0
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                yield _record_chunk(chunk, text_field, id_field, row)
+                row += len(chunk)
+    else:
+        with open(path, encoding='utf-8') as f:
+            row = 0
+            while True:
+                raw_lines = list(islice(f, chunk_size))
+                if not raw_lines:
+                    break
+                # Blank lines are skipped, but a run of them must not end the file early
+                records = [json.loads(line) for line in raw_lines if line.strip()]
+                if not records:
+                    continue
+                yield _record_chunk(records, text_field, id_field, row)
+                row += len(records)
+
+
+class ResultWriter:
+    """Streams (id, score) rows as CSV or JSONL"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.writer(stream)
+            self.writer.writerow(['id'] + OUTPUT_FIELDS)
+
+    def write(self, ids, scores):
+        if self.fmt == 'csv':
+            self.writer.writerows([row_id] + [score[field] for field in OUTPUT_FIELDS]
+                                  for row_id, score in zip(ids, scores))
+        else:
+            self.stream.writelines(json.dumps({'id': row_id, **score}) + '\n'
+                                   for row_id, score in zip(ids, scores))
+
+
+def score_stream(chunks, writer, workers, kernel=None):
+    """Score chunks in order, keeping at most 2 chunks per worker in flight"""
+    total = 0
+    if workers <= 1:
+        _init_worker(kernel)
+        for ids, texts in chunks:
+            writer.write(ids, score_chunk(texts))
+            total += len(ids)
+        return total
+
+    from multiprocessing import Pool
+    with Pool(workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for ids, texts in chunks:
+            pending.append((ids, pool.apply_async(score_chunk, (texts,))))
+            if len(pending) >= workers * 2:
+                done_ids, result = pending.popleft()
+                writer.write(done_ids, result.get())
+                total += len(done_ids)
+        while pending:
+            done_ids, result = pending.popleft()
+            writer.write(done_ids, result.get())
+            total += len(done_ids)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV or JSONL file of reviews in bounded memory')
+    parser.add_argument('input', help='CSV, JSONL or JSON array file')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl', 'json'], help='default: from the file extension')
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help='default: same as input (jsonl for json)')
+    parser.add_argument('--text-field', default='review', help='column/field holding the text (default: review)')
+    parser.add_argument('--id-field', help='column/field copied to the output id (default: row number)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows scored per vectorized pass')
+    parser.add_argument('--workers', type=int, default=1, help='scoring processes; 0 = one per CPU core')
+    args = parser.parse_args()
+
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or ('jsonl' if in_fmt == 'json' else in_fmt)
+    workers = args.workers or os.cpu_count() or 1
+
+    # Same lookup the workers use, so MODEL_VARIANT=hashed with only models/hashed_bundle/ works
+    kernel = load_scoring_kernel()
+    if kernel is None:
+        print("❌ No trained models found in models/. Run: python train_models.py", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        chunks = read_chunks(args.input, in_fmt, args.text_field, args.id_field, args.chunk_size)
+        total = score_stream(chunks, ResultWriter(out, out_fmt), workers, kernel)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"✓ Scored {total} reviews in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s, "
+          f"{workers} worker{'s' if workers != 1 else ''})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
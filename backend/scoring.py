@@ -0,0 +1,54 @@
+"""
+Fused scoring engine shared by the API endpoints
+
+Each model runs exactly one predict_proba pass over a shared TF-IDF matrix;
+the predicted label and its confidence are both read from that result
+instead of calling predict and predict_proba separately. When a
+linear_kernel.LinearKernel is available, score_with_kernel skips the sparse
+matrices and sklearn calls altogether.
+"""
+
+
+def sentiment_label(pred):
+    """Map a model class label to the API sentiment string"""
+    return 'positive' if pred == 1 else 'negative'
+
+
+def scores_from_proba(lr_probs, lr_classes, nb_probs, nb_classes):
+    """Turn per-model probability matrices into per-text score dicts"""
+    # argmax of predict_proba is exactly what predict() returns
+    lr_preds = lr_classes[lr_probs.argmax(axis=1)].tolist()
+    nb_preds = nb_classes[nb_probs.argmax(axis=1)].tolist()
+    lr_confidences = lr_probs.max(axis=1).tolist()
+    nb_confidences = nb_probs.max(axis=1).tolist()
+    
+    return [
+        {
+            'lr_sentiment': sentiment_label(lr_pred),
+            'lr_prob': lr_conf,
+            'nb_sentiment': sentiment_label(nb_pred),
+            'nb_prob': nb_conf,
+        }
+        for lr_pred, lr_conf, nb_pred, nb_conf
+        in zip(lr_preds, lr_confidences, nb_preds, nb_confidences)
+    ]
+
+
+def score_tfidf(text_tfidf, model_lr, model_nb):
+    """Score every row of a TF-IDF matrix with both models"""
+    lr_probs = model_lr.predict_proba(text_tfidf)
+    nb_probs = model_nb.predict_proba(text_tfidf)
+    return scores_from_proba(lr_probs, model_lr.classes_, nb_probs, model_nb.classes_)
+
+
+def score_texts(cleaned_texts, vectorizer, tfidf_transformer, model_lr, model_nb):
+    """Vectorize already-cleaned texts once and score them with both models"""
+    text_counts = vectorizer.transform(cleaned_texts)
+    text_tfidf = tfidf_transformer.transform(text_counts)
+    return score_tfidf(text_tfidf, model_lr, model_nb)
+
+
+def score_with_kernel(cleaned_texts, kernel):
+    """Score already-cleaned texts straight from a LinearKernel's weight tables"""
+    lr_probs, nb_probs = kernel.predict_proba(cleaned_texts)
+    return scores_from_proba(lr_probs, kernel.lr_classes, nb_probs, kernel.nb_classes)
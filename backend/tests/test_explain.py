@@ -0,0 +1,69 @@
+"""LinearKernel.explain: bias plus every token's contribution is the model's log-odds"""
+import numpy as np
+import pytest
+from synthetic import fit_pipeline, generate_reviews
+
+from linear_kernel import LinearKernel
+from model_bundle import FEATURES_HASHED, FEATURES_VOCABULARY, load_bundle, save_bundle
+from text_normalizer import clean_texts
+from train_models import make_vectorizer
+
+TOLERANCE = 1e-9
+
+# Every token of the test documents, so the contributions are complete
+ALL_TOKENS = 10 ** 6
+
+
+@pytest.fixture(scope='module', params=[FEATURES_VOCABULARY, FEATURES_HASHED])
+def fitted(request, tmp_path_factory):
+    reviews, sentiments = generate_reviews(300, min_words=20, max_words=80)
+    # A narrow hashed space, so distinct tokens share columns
+    pipeline = fit_pipeline(clean_texts(reviews), sentiments, make_vectorizer(request.param, hash_bits=10))
+    directory = str(tmp_path_factory.mktemp('bundle'))
+    save_bundle(*pipeline, directory=directory)
+    return pipeline, LinearKernel.from_bundle(load_bundle(directory))
+
+
+@pytest.fixture(scope='module')
+def documents():
+    return clean_texts(generate_reviews(40, seed=11)[0]) + ['great great film', 'zzzqqq', '']
+
+
+def log_odds(pipeline, text):
+    vectorizer, tfidf_transformer, model_lr, model_nb = pipeline
+    X = tfidf_transformer.transform(vectorizer.transform([text]))
+    nb_log_proba = model_nb.predict_log_proba(X)[0]
+    return {'logistic_regression': model_lr.decision_function(X)[0],
+            'naive_bayes': nb_log_proba[1] - nb_log_proba[0]}
+
+
+def test_bias_plus_contributions_is_log_odds(fitted, documents):
+    pipeline, kernel = fitted
+    for text in documents:
+        explanation = kernel.explain(text, ALL_TOKENS)
+        for name, expected in log_odds(pipeline, text).items():
+            total = explanation[name]['bias'] + sum(token['contribution'] for token in explanation[name]['tokens'])
+            assert total == pytest.approx(expected, abs=TOLERANCE)
+
+
+def test_top_k_ranked_by_absolute_contribution(fitted, documents):
+    _, kernel = fitted
+    for text in documents:
+        full = kernel.explain(text, ALL_TOKENS)
+        top = kernel.explain(text, 3)
+        for name, section in top.items():
+            assert section['tokens'] == full[name]['tokens'][:3]
+            magnitudes = [abs(token['contribution']) for token in full[name]['tokens']]
+            assert magnitudes == sorted(magnitudes, reverse=True)
+
+
+def test_counts_and_signs(fitted):
+    pipeline, kernel = fitted
+    explanation = kernel.explain('great great film', ALL_TOKENS)
+    counts = {token['token']: token['count'] for token in explanation['logistic_regression']['tokens']}
+    assert counts.get('great') == 2
+    # Each contribution pushes towards the class its weight favours
+    _, _, model_lr, _ = pipeline
+    for token in explanation['logistic_regression']['tokens']:
+        column = kernel.token_terms(token['token'])[1][0]
+        assert np.sign(token['contribution']) == np.sign(model_lr.coef_[0][column])
@@ -0,0 +1,55 @@
+"""LexiconScorer matches whole tokens, prefers the longest phrase and is deterministic"""
+import pytest
+
+from lexicon_scorer import LexiconScorer, parse_lexicon
+from text_normalizer import clean_text
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return LexiconScorer([('bad', -1.0), ('good', 1.0), ('not good', -2.0), ('not good at all', -4.0),
+                          ('waste of time', -3.0)])
+
+
+def polarity(scorer, text):
+    return scorer.polarity(clean_text(text))
+
+
+def test_whole_tokens_only(scorer):
+    assert polarity(scorer, 'I played badminton') == 0.0
+    assert polarity(scorer, 'a bad film') == -1.0
+    assert polarity(scorer, 'goodness me') == 0.0
+
+
+def test_longest_phrase_wins(scorer):
+    assert polarity(scorer, 'good') == 1.0
+    assert polarity(scorer, 'not good') == -2.0
+    assert polarity(scorer, 'not good at all') == -4.0
+    # An incomplete longer phrase falls back to the longest one that did match
+    assert polarity(scorer, 'not good at the end') == -2.0
+    assert polarity(scorer, 'a waste of money') == 0.0
+
+
+def test_phrases_are_cleaned_like_input(scorer):
+    assert polarity(scorer, 'Total WASTE of time!!!') == -3.0
+
+
+def test_deterministic(scorer):
+    texts = [clean_text(text) for text in ['good but not good at all', 'bad bad good', '']]
+    assert scorer.score(texts) == scorer.score(texts)
+    rebuilt = LexiconScorer([('waste of time', -3.0), ('not good at all', -4.0), ('not good', -2.0),
+                             ('good', 1.0), ('bad', -1.0)])
+    assert rebuilt.score(texts) == scorer.score(texts)
+
+
+def test_score_keys_and_confidence(scorer):
+    positive, neutral = scorer.score([clean_text('good good good'), clean_text('nothing here')])
+    assert positive == {'lr_sentiment': 'positive', 'lr_prob': 0.8, 'nb_sentiment': 'positive', 'nb_prob': 0.8}
+    assert neutral['lr_sentiment'] == 'negative' and neutral['lr_prob'] == 0.5
+
+
+def test_parse_lexicon():
+    lines = ['# comment', '', 'good\t2', 'waste of time -3', 'fine\t1  # trailing']
+    assert list(parse_lexicon(lines)) == [('good', 2.0), ('waste of time', -3.0), ('fine', 1.0)]
+    with pytest.raises(ValueError):
+        list(parse_lexicon(['good\tgreat']))
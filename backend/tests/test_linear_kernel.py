@@ -0,0 +1,106 @@
+"""LinearKernel must reproduce the sklearn CountVectorizer -> TfidfTransformer -> predict_proba chain"""
+import os
+
+import numpy as np
+import pytest
+from synthetic import fit_pipeline, generate_reviews
+
+from linear_kernel import LinearKernel
+from model_bundle import KERNEL_TABLE, bundle_path, load_bundle, save_bundle
+from scoring import score_texts, score_with_kernel
+from text_normalizer import clean_texts
+
+TOLERANCE = 1e-12
+
+
+@pytest.fixture(scope='module')
+def pipeline():
+    reviews, sentiments = generate_reviews(400, min_words=20, max_words=80)
+    return fit_pipeline(clean_texts(reviews), sentiments)
+
+
+@pytest.fixture(scope='module')
+def queries():
+    # Empty, stop-word-only and out-of-vocabulary documents have all-zero TF-IDF rows
+    return clean_texts(generate_reviews(60, seed=7)[0]) + ['', 'the and of', 'zzzqqq']
+
+
+@pytest.fixture(scope='module', params=['bundle', 'bundle without table', 'sklearn'])
+def kernel(request, pipeline, tmp_path_factory):
+    if request.param == 'sklearn':
+        return LinearKernel.from_sklearn(*pipeline)
+    directory = tmp_path_factory.mktemp('bundle')
+    save_bundle(*pipeline, directory=str(directory))
+    if request.param == 'bundle without table':
+        # Bundles exported before the weight table was stored build it at load time
+        os.remove(os.path.join(bundle_path(str(directory)), f'{KERNEL_TABLE}.npy'))
+    return LinearKernel.from_bundle(load_bundle(str(directory)))
+
+
+def sklearn_proba(pipeline, texts):
+    vectorizer, tfidf_transformer, model_lr, model_nb = pipeline
+    X = tfidf_transformer.transform(vectorizer.transform(texts))
+    return model_lr.predict_proba(X), model_nb.predict_proba(X)
+
+
+def test_batch_matches_sklearn(kernel, pipeline, queries):
+    lr_probs, nb_probs = kernel.predict_proba(queries)
+    lr_expected, nb_expected = sklearn_proba(pipeline, queries)
+    np.testing.assert_allclose(lr_probs, lr_expected, rtol=0, atol=TOLERANCE)
+    np.testing.assert_allclose(nb_probs, nb_expected, rtol=0, atol=TOLERANCE)
+
+
+def test_single_document_matches_sklearn(kernel, pipeline, queries):
+    # weigh() reduces one document without the per-document bincount grouping
+    lr_expected, nb_expected = sklearn_proba(pipeline, queries)
+    for i, query in enumerate(queries):
+        lr_probs, nb_probs = kernel.predict_proba([query])
+        np.testing.assert_allclose(lr_probs[0], lr_expected[i], rtol=0, atol=TOLERANCE)
+        np.testing.assert_allclose(nb_probs[0], nb_expected[i], rtol=0, atol=TOLERANCE)
+
+
+def test_scores_match_score_texts(kernel, pipeline, queries):
+    for got, want in zip(score_with_kernel(queries, kernel), score_texts(queries, *pipeline)):
+        assert (got['lr_sentiment'], got['nb_sentiment']) == (want['lr_sentiment'], want['nb_sentiment'])
+        assert got['lr_prob'] == pytest.approx(want['lr_prob'], abs=TOLERANCE)
+        assert got['nb_prob'] == pytest.approx(want['nb_prob'], abs=TOLERANCE)
+
+
+def test_bundle_table_is_memory_mapped(pipeline, tmp_path):
+    save_bundle(*pipeline, directory=str(tmp_path))
+    kernel = LinearKernel.from_bundle(load_bundle(str(tmp_path)))
+    assert not kernel.table.flags.owndata and not kernel.table.flags.writeable
+
+
+def test_no_documents(kernel):
+    lr_probs, nb_probs = kernel.predict_proba([])
+    assert lr_probs.shape == nb_probs.shape == (0, 2)
+
+
+def test_bundle_saves_switch_versions_atomically(pipeline, tmp_path):
+    directory = str(tmp_path)
+    save_bundle(*pipeline, directory=directory)
+    first = load_bundle(directory)
+    save_bundle(*pipeline, directory=directory)
+    second = load_bundle(directory)
+    # Each save is a separate directory; the one loaded before keeps its files
+    assert first.directory != second.directory
+    assert os.path.exists(os.path.join(first.directory, 'manifest.json'))
+    save_bundle(*pipeline, directory=directory)
+    # Only the live version and the one before it are kept
+    assert sorted(os.listdir(directory)) == ['CURRENT', 'v2', 'v3']
+    assert bundle_path(directory) == os.path.join(directory, 'v3')
+
+
+def test_flat_bundle_still_loads_and_is_replaced(pipeline, tmp_path):
+    directory = str(tmp_path)
+    save_bundle(*pipeline, directory=directory)
+    # The layout before versions: files directly in the bundle directory
+    live = bundle_path(directory)
+    for name in os.listdir(live):
+        os.replace(os.path.join(live, name), os.path.join(directory, name))
+    os.rmdir(live)
+    os.remove(os.path.join(directory, 'CURRENT'))
+    assert load_bundle(directory).directory == directory
+    save_bundle(*pipeline, directory=directory)
+    assert sorted(os.listdir(directory)) == ['CURRENT', 'v1']
@@ -0,0 +1,63 @@
+"""score_long_text must score a long document like clean_text + the kernel on the whole text"""
+import pytest
+from synthetic import fit_pipeline, generate_reviews
+
+from linear_kernel import LinearKernel
+from long_text import _inside_break, iter_chunks, score_long_text
+from scoring import score_with_kernel
+from text_normalizer import LINE_BREAK, clean_text, clean_texts
+
+TOLERANCE = 1e-9
+
+
+@pytest.fixture(scope='module')
+def kernel():
+    reviews, sentiments = generate_reviews(400, min_words=20, max_words=80)
+    return LinearKernel.from_sklearn(*fit_pipeline(clean_texts(reviews), sentiments))
+
+
+@pytest.fixture(scope='module')
+def long_text():
+    # Glued line breaks ("great<br />film") are only safe when spans never cut inside them
+    reviews = generate_reviews(200, seed=3)[0]
+    return LINE_BREAK.join(review.replace(' ', LINE_BREAK, 1) for review in reviews)
+
+
+def whole_text_score(kernel, text):
+    return score_with_kernel([clean_text(text)], kernel)[0]
+
+
+def assert_same_score(got, want):
+    assert (got['lr_sentiment'], got['nb_sentiment']) == (want['lr_sentiment'], want['nb_sentiment'])
+    assert got['lr_prob'] == pytest.approx(want['lr_prob'], abs=TOLERANCE)
+    assert got['nb_prob'] == pytest.approx(want['nb_prob'], abs=TOLERANCE)
+
+
+@pytest.mark.parametrize('chunk_chars', [7, 64, 1000, 10 ** 7])
+def test_matches_single_piece(kernel, long_text, chunk_chars):
+    result = score_long_text(long_text, kernel, chunk_chars=chunk_chars)
+    assert result['complete'] and result['chars_scored'] == len(long_text)
+    assert_same_score(result['score'], whole_text_score(kernel, long_text))
+
+
+@pytest.mark.parametrize('chunk_chars', [1, 3, 7, 64])
+def test_spans_cover_text_and_avoid_line_breaks(long_text, chunk_chars):
+    spans = list(iter_chunks(long_text, chunk_chars))
+    assert spans[0][0] == 0 and spans[-1][1] == len(long_text)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    assert not any(_inside_break(long_text, end) for _, end in spans[:-1])
+
+
+def test_per_chunk_scores_match_each_span(kernel, long_text):
+    result = score_long_text(long_text, kernel, chunk_chars=500, per_chunk=True)
+    assert len(result['chunks']) == len(list(iter_chunks(long_text, 500)))
+    for chunk in result['chunks']:
+        assert_same_score(chunk, whole_text_score(kernel, long_text[chunk['start']:chunk['end']]))
+
+
+def test_budget_marks_result_incomplete(kernel, long_text):
+    # A budget that is spent after the first span
+    result = score_long_text(long_text, kernel, chunk_chars=500, time_budget=1e-12)
+    assert not result['complete']
+    assert 0 < result['chars_scored'] < len(long_text)
+    assert_same_score(result['score'], whole_text_score(kernel, long_text[:result['chars_scored']]))
@@ -0,0 +1,44 @@
+"""A scrape answered by one worker merges the snapshots the others published"""
+import json
+import os
+import time
+
+import metrics
+
+
+def make_registry():
+    registry = metrics.Registry()
+    requests = registry.register(metrics.Counter('requests_total', 'Requests', labels=('endpoint',)))
+    requests.inc('predict')
+    return registry
+
+
+def publish_as(directory, pid, registry):
+    # Another worker's snapshot: the same families, labelled with its pid
+    families = json.loads(json.dumps(registry.collect()).replace(f'worker=\\"{os.getpid()}\\"', f'worker=\\"{pid}\\"'))
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+        json.dump(families, f)
+
+
+def test_render_merges_other_workers(tmp_path):
+    registry = make_registry()
+    publish_as(str(tmp_path), 1, registry)
+    text = registry.render(str(tmp_path))
+    assert text.count('# HELP requests_total') == 1
+    assert f'requests_total{{worker="{os.getpid()}",endpoint="predict"}} 1' in text
+    assert 'requests_total{worker="1",endpoint="predict"} 1' in text
+
+
+def test_stale_snapshot_dropped(tmp_path):
+    registry = make_registry()
+    publish_as(str(tmp_path), 1, registry)
+    old = time.time() - 10 * metrics.PUBLISH_INTERVAL
+    os.utime(tmp_path / '1.json', (old, old))
+    assert 'worker="1"' not in registry.render(str(tmp_path))
+    assert not (tmp_path / '1.json').exists()
+
+
+def test_own_snapshot_not_duplicated(tmp_path):
+    registry = make_registry()
+    registry.publish(str(tmp_path))
+    assert registry.render(str(tmp_path)).count('requests_total{') == 1
@@ -0,0 +1,73 @@
+"""MicroBatcher waits only for requests that are still running"""
+import threading
+import time
+
+from micro_batcher import MicroBatcher
+
+
+def make_batcher(max_wait=1.0):
+    sizes = []
+
+    def score(texts):
+        sizes.append(len(texts))
+        return [{'text': text} for text in texts]
+
+    return MicroBatcher(score, max_wait=max_wait, max_batch_size=64), sizes
+
+
+def test_lone_request_is_not_delayed():
+    batcher, sizes = make_batcher()
+    batcher.begin_request()
+    start = time.perf_counter()
+    assert batcher.score(['alone']) == [{'text': 'alone'}]
+    batcher.end_request()
+    assert time.perf_counter() - start < 0.5
+    assert sizes == [1]
+
+
+def test_running_requests_are_coalesced():
+    batcher, sizes = make_batcher()
+    count = 4
+    started = threading.Barrier(count)
+    results = [None] * count
+
+    def request(i):
+        batcher.begin_request()
+        started.wait()
+        # Staggered so the collector has to wait for the later ones
+        time.sleep(0.02 * i)
+        results[i] = batcher.score([f'text {i}'])[0]
+        batcher.end_request()
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{'text': f'text {i}'} for i in range(count)]
+    assert sizes == [count]
+    assert time.perf_counter() - start < 0.5
+
+
+def test_request_ending_without_submitting_releases_the_wait():
+    batcher, sizes = make_batcher()
+    released = threading.Event()
+
+    def cache_hit():
+        batcher.begin_request()
+        released.wait()
+        batcher.end_request()
+
+    other = threading.Thread(target=cache_hit)
+    other.start()
+    batcher.begin_request()
+    future = batcher.submit('miss')
+    time.sleep(0.05)
+    start = time.perf_counter()
+    released.set()
+    assert future.result(timeout=0.5) == {'text': 'miss'}
+    assert time.perf_counter() - start < 0.5
+    batcher.end_request()
+    other.join()
+    assert sizes == [1]
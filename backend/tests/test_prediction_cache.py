@@ -0,0 +1,29 @@
+"""Scores cached for one model version are never served for another"""
+from prediction_cache import PredictionCache
+
+
+def scorer(label, calls):
+    def score(texts):
+        calls.append(list(texts))
+        return [{'label': label, 'text': text} for text in texts]
+    return score
+
+
+def test_cached_scores_reused_within_a_version():
+    cache, calls = PredictionCache(), []
+    first = cache.score(['a', 'b'], scorer('v1', calls), version=1)
+    assert cache.score(['b', 'a'], scorer('v1', calls), version=1) == first[::-1]
+    assert calls == [['a', 'b']]
+
+
+def test_score_stored_after_a_swap_is_not_served_to_new_models():
+    cache, calls = PredictionCache(), []
+
+    def old_models(texts):
+        # The models are swapped (and the cache cleared) while this request is scoring
+        cache.clear()
+        return scorer('v1', calls)(texts)
+
+    assert cache.score(['a'], old_models, version=1)[0]['label'] == 'v1'
+    assert cache.score(['a'], scorer('v2', calls), version=2)[0]['label'] == 'v2'
+    assert calls == [['a'], ['a']]
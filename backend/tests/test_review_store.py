@@ -0,0 +1,49 @@
+"""Aggregates stay in step across stores (worker processes) sharing one database"""
+import json
+
+from review_store import ReviewStore
+
+
+def score(reviews):
+    return [{'lr_sentiment': 'positive' if 'good' in review else 'negative',
+             'nb_sentiment': 'positive' if 'good' in review else 'negative',
+             'lr_prob': 1.0 if 'good' in review else 0.0,
+             'nb_prob': 1.0 if 'good' in review else 0.0} for review in reviews]
+
+
+def make_stores(tmp_path, count=2):
+    seed = tmp_path / 'seed.json'
+    seed.write_text(json.dumps({'Inception': ['good film', 'bad film']}))
+    calls = []
+
+    def counting_score(reviews):
+        calls.append(len(reviews))
+        return score(reviews)
+
+    stores = [ReviewStore(str(tmp_path / 'reviews.db'), str(seed), counting_score) for _ in range(count)]
+    return stores, calls
+
+
+def test_ingested_reviews_visible_to_other_store(tmp_path):
+    (writer, reader), _ = make_stores(tmp_path)
+    assert reader.find('inception').reviews == 2
+    writer.add_reviews('Interstellar', ['good space'])
+    movie = reader.find('interstellar')
+    assert movie is not None and movie.reviews == 1 and movie.lr_positive == 1
+
+
+def test_own_ingestion_counted_and_scored_once(tmp_path):
+    (store,), calls = make_stores(tmp_path, count=1)
+    store.find('inception')
+    calls.clear()
+    assert store.add_reviews('Inception', ['good again', 'bad again']).reviews == 4
+    assert store.find('inception').reviews == 4
+    assert calls == [2]
+
+
+def test_imported_rows_folded_on_next_search(tmp_path):
+    (store,), _ = make_stores(tmp_path, count=1)
+    store.find('inception')
+    store.import_rows([('Inception', 'good'), ('Tenet', 'bad')])
+    assert store.find('inception').reviews == 3
+    assert store.find('tenet').reviews == 1
@@ -0,0 +1,78 @@
+"""score_file.read_chunks must yield every record, in order"""
+import json
+
+import pytest
+
+from score_file import detect_format, read_chunks
+
+
+def write_jsonl(path, blocks):
+    with open(path, 'w', encoding='utf-8') as f:
+        for block in blocks:
+            f.write(block if isinstance(block, str) else json.dumps(block) + '\n')
+
+
+def collect(path, fmt, chunk_size, id_field=None):
+    ids, texts = [], []
+    for chunk_ids, chunk_texts in read_chunks(str(path), fmt, 'review', id_field, chunk_size):
+        assert 0 < len(chunk_ids) <= chunk_size
+        ids += chunk_ids
+        texts += chunk_texts
+    return ids, texts
+
+
+def test_jsonl_blank_run_longer_than_a_chunk(tmp_path):
+    path = tmp_path / 'gap.jsonl'
+    records = [{'review': f'review {i}'} for i in range(15)]
+    write_jsonl(path, records[:10] + ['\n' * 30] + records[10:])
+    ids, texts = collect(path, 'jsonl', chunk_size=10)
+    assert texts == [record['review'] for record in records]
+    assert ids == list(range(15))
+
+
+def test_json_array(tmp_path):
+    path = tmp_path / 'dump.json'
+    records = [{'id': f'r{i}', 'review': f'review {i}'} for i in range(7)]
+    path.write_text(json.dumps(records), encoding='utf-8')
+    assert detect_format(str(path), None) == 'json'
+    ids, texts = collect(path, 'json', chunk_size=3, id_field='id')
+    assert ids == [record['id'] for record in records]
+    assert texts == [record['review'] for record in records]
+
+
+def test_json_not_an_array(tmp_path):
+    path = tmp_path / 'dump.json'
+    path.write_text('{"review": "one"}', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(read_chunks(str(path), 'json', 'review', None, 10))
+
+
+@pytest.mark.parametrize('name, fmt', [('a.jsonl', 'jsonl'), ('a.NDJSON', 'jsonl'), ('a.json', 'json'), ('a.csv', 'csv')])
+def test_detect_format(name, fmt):
+    assert detect_format(name, None) == fmt
+
+
+def test_json_array_across_read_blocks(tmp_path, monkeypatch):
+    # Tiny refills split records, strings and numbers mid-token
+    monkeypatch.setattr('score_file.JSON_READ_SIZE', 7)
+    path = tmp_path / 'dump.json'
+    records = [{'id': 1000 + i, 'review': f'review, "quoted" [{i}]'} for i in range(20)]
+    path.write_text(' [\n' + ' ,\n'.join(json.dumps(record) for record in records) + '\n]\n', encoding='utf-8')
+    ids, texts = collect(path, 'json', chunk_size=6, id_field='id')
+    assert ids == [record['id'] for record in records]
+    assert texts == [record['review'] for record in records]
+
+
+@pytest.mark.parametrize('text', ['[]', ' [ ] '])
+def test_json_empty_array(tmp_path, text):
+    path = tmp_path / 'dump.json'
+    path.write_text(text, encoding='utf-8')
+    assert collect(path, 'json', chunk_size=3) == ([], [])
+
+
+@pytest.mark.parametrize('text', ['[{"review": "a"} {"review": "b"}]', '[{"review": "a"},', '[{"review": "a"'])
+def test_json_malformed_array(tmp_path, text):
+    path = tmp_path / 'dump.json'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(read_chunks(str(path), 'json', 'review', None, 10))
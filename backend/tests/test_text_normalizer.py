@@ -0,0 +1,56 @@
+"""clean_text / clean_texts must match the original three-regex clean_text byte for byte"""
+import re
+
+import pandas as pd
+import pytest
+from synthetic import generate_reviews
+
+from text_normalizer import clean_text, clean_texts
+
+# Inputs that exercise Unicode casing, digits and markup edge cases
+EDGE_CASES = [
+    '', 'ΟΔΥΣΣΕΥΣ', 'Σ', 'İstanbul', 'Straße ﬁlm Ǆ', '٣٤ ²³ ½ 10/10',
+    'a<br />b<br /><br />c', '<br', ' />', 'snake_case-and—dashes', 'tab\there\nnewline',
+    'Café <br />naïve 2nd!', 42, None,
+]
+
+
+def legacy_clean_text(text):
+    """The original clean_text from app.py / train_models.py"""
+    text = re.sub(r'<br />', ' ', str(text))
+    text = re.sub(r'\d+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = text.lower()
+    return text
+
+
+REVIEWS = generate_reviews(200)[0] + EDGE_CASES
+
+
+@pytest.mark.parametrize('text', EDGE_CASES)
+def test_clean_text_edge_cases(text):
+    assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_clean_text_matches_legacy_on_reviews():
+    assert [clean_text(text) for text in REVIEWS] == [legacy_clean_text(text) for text in REVIEWS]
+
+
+def test_clean_texts_list():
+    cleaned = clean_texts(REVIEWS)
+    assert isinstance(cleaned, list)
+    assert cleaned == [legacy_clean_text(text) for text in REVIEWS]
+
+
+def test_clean_texts_series_keeps_index_and_name():
+    reviews = pd.Series(REVIEWS, index=range(1000, 1000 + 2 * len(REVIEWS), 2), name='review')
+    cleaned = clean_texts(reviews)
+    assert isinstance(cleaned, pd.Series)
+    assert cleaned.index.equals(reviews.index)
+    assert cleaned.name == 'review'
+    assert cleaned.tolist() == reviews.apply(legacy_clean_text).tolist()
+
+
+def test_clean_texts_empty():
+    assert clean_texts([]) == []
+    assert clean_texts(pd.Series([], dtype=object)).empty
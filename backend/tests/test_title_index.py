@@ -0,0 +1,72 @@
+"""TitleIndex resolves titles like the substring scan it replaced, in time linear in the query"""
+import time
+
+from review_store import TitleIndex
+
+TITLES = ['inception', 'the dark knight', 'interstellar', 'the shawshank redemption']
+
+
+def make_index():
+    index = TitleIndex()
+    for title in TITLES:
+        index.add(title)
+    return index
+
+
+def test_exact_title():
+    assert make_index().find('The Dark Knight') == 'the dark knight'
+
+
+def test_title_inside_query():
+    index = make_index()
+    assert index.find('inception review') == 'inception'
+    assert index.find('i loved the shawshank redemption a lot') == 'the shawshank redemption'
+
+
+def test_prefix_of_title_word():
+    assert make_index().find('dark kni') == 'the dark knight'
+
+
+def test_unknown_title():
+    assert make_index().find('casablanca') is None
+
+
+def test_long_query_is_linear():
+    # Unbounded span lengths made this take tens of seconds
+    query = ' '.join(f'word{i}' for i in range(2000)) + ' inception'
+    start = time.perf_counter()
+    assert make_index().find(query) == 'inception'
+    assert time.perf_counter() - start < 1.0
+
+
+def test_bulk_build_matches_incremental_adds():
+    bulk = TitleIndex(TITLES)
+    for query in ['the dark knight', 'inception review', 'dark kni', 'the', 'inter', 'casablanca']:
+        assert bulk.find(query) == make_index().find(query)
+
+
+def test_prefix_tie_goes_to_first_title_across_blocks():
+    # Enough matches to span several blocks; the earliest title sorts last among them
+    titles = [f'the z{i:05d}' for i in range(3 * TitleIndex.BLOCK)]
+    titles += [f'the a{i:05d}' for i in range(3 * TitleIndex.BLOCK)]
+    index = TitleIndex(titles)
+    assert index.find('the') == 'the z00000'
+    assert index.find('the a') == 'the a00000'
+
+
+def test_title_added_after_build():
+    index = TitleIndex(TITLES)
+    index.add('the matrix')
+    assert index.find('matr') == 'the matrix'
+    # Built titles still win prefix ties over later additions
+    assert index.find('the') == 'the dark knight'
+
+
+def test_build_and_short_prefix_are_fast():
+    # One insort per suffix made a 40k-title build take seconds
+    titles = [f'movie number {i} part {i % 7}' for i in range(40000)]
+    start = time.perf_counter()
+    index = TitleIndex(titles)
+    for _ in range(100):
+        assert index.find('m') == titles[0]
+    assert time.perf_counter() - start < 2.0
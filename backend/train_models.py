@@ -1,37 +1,250 @@
 """
 Script to train and save sentiment analysis models
 Based on the sentiment analysis.ipynb notebook
+
+Usage:
+    python train_models.py                 # serial, reuses cached features when possible
+    python train_models.py --jobs 0        # clean text on every core, fit LR and NB concurrently
+    python train_models.py --no-cache      # always re-clean and re-vectorize
+    python train_models.py --features hashed --hash-bits 18   # hashed-feature model family
 """
+import argparse
 import pandas as pd
 import numpy as np
-import re
 import joblib
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 from sklearn.utils import shuffle
 
+from feature_cache import FEATURE_CACHE_DIR, cache_key, load_features, save_features
+from linear_kernel import LinearKernel
+from model_bundle import BUNDLE_DIR, FEATURES_HASHED, FEATURES_VOCABULARY, HASHED_BUNDLE_DIR, METRICS_FILE
+from model_bundle import bundle_path, load_bundle, save_bundle, save_metrics
+from scoring import score_with_kernel
+from text_normalizer import clean_text, clean_texts
+
+DATASET_PATH = 'data/IMDB Dataset.csv'
+
+# Everything that shapes the cached features; part of the cache key
+VECTORIZER_PARAMS = {'stop_words': 'english'}
+SPLIT_PARAMS = {'test_size': 0.2, 'random_state': 42}
+SHUFFLE_SEED = 42
+
+# Width of the hashed feature space is 2 ** HASH_BITS
+HASH_BITS = 18
+
+# Pickled artifacts, sized in the training report next to the bundle
+MODEL_FILES = ['models/logreg_model.pkl', 'models/naive_bayes_model.pkl', 'models/vectorizer.pkl', 'models/tfidf.pkl']
+
+# Dataset reviews scored to measure inference latency for the metrics report
+LATENCY_SAMPLE = 1000
+
+
+def make_vectorizer(features=FEATURES_VOCABULARY, hash_bits=HASH_BITS):
+    """Fitted-vocabulary CountVectorizer, or a stateless HashingVectorizer producing raw counts"""
+    if features == FEATURES_HASHED:
+        return HashingVectorizer(n_features=2 ** hash_bits, alternate_sign=False, norm=None,
+                                 **VECTORIZER_PARAMS)
+    return CountVectorizer(**VECTORIZER_PARAMS)
+
+
+def clean_parallel(reviews, jobs):
+    """clean_texts spread over a process pool; order is preserved"""
+    reviews = list(reviews)
+    if jobs <= 1 or len(reviews) < 1000:
+        return clean_texts(reviews)
+    chunk = -(-len(reviews) // (jobs * 4))
+    with Pool(jobs) as pool:
+        parts = pool.map(clean_texts, [reviews[i:i + chunk] for i in range(0, len(reviews), chunk)])
+    return [text for part in parts for text in part]
+
+
+def load_reviews(dataset_path=DATASET_PATH):
+    """Read the dataset CSV in the shuffled order training uses"""
+    return shuffle(pd.read_csv(dataset_path), random_state=SHUFFLE_SEED)
+
+
+def clean_corpus(df, jobs=1):
+    """Cleaned reviews with 1/0 sentiment labels, indexed like df"""
+    return pd.DataFrame({
+        'review': clean_parallel(df['review'], jobs),
+        'sentiment': [1 if x.lower() == 'positive' else 0 for x in df['sentiment']]
+    }, index=df.index)
+
+
+def split_corpus(corpus):
+    """Train/test split of a cleaned corpus; returns (X_train, X_test, y_train, y_test) with numpy labels"""
+    X_train, X_test, y_train, y_test = train_test_split(
+        corpus['review'], corpus['sentiment'], **SPLIT_PARAMS
+    )
+    return X_train, X_test, y_train.to_numpy(), y_test.to_numpy()
+
+
+def prepare_features(dataset_path=DATASET_PATH, jobs=1, use_cache=True, cache_dir=FEATURE_CACHE_DIR,
+                     features=FEATURES_VOCABULARY, hash_bits=HASH_BITS):
+    """Load, clean, split and vectorize the dataset, reusing the feature cache when possible
+    
+    features selects the vocabulary ('vocabulary') or hashed ('hashed') feature space.
+    Returns (vectorizer, tfidf_transformer, X_train_tfidf, X_test_tfidf, y_train, y_test, timings).
+    """
+    timings = {}
+    settings = {'features': features}
+    if features == FEATURES_HASHED:
+        settings['hash_bits'] = hash_bits
+    key = cache_key(dataset_path, shuffle_seed=SHUFFLE_SEED, vectorizer=VECTORIZER_PARAMS, split=SPLIT_PARAMS,
+                    **settings)
+    cached = load_features(key, cache_dir) if use_cache else None
+    
+    start = time.perf_counter()
+    if cached is not None:
+        corpus, vectorizer, X_train_counts, X_test_counts, y_train, y_test = cached
+        timings['load_cache'] = time.perf_counter() - start
+        print(f"✓ Reused cached features ({key}) for {len(corpus)} reviews")
+    else:
+        df = load_reviews(dataset_path)
+        timings['load'] = time.perf_counter() - start
+        print(f"✓ Loaded {len(df)} reviews")
+        
+        # Preprocess
+        print("\n✓ Preprocessing text...")
+        start = time.perf_counter()
+        corpus = clean_corpus(df, jobs)
+        timings['clean'] = time.perf_counter() - start
+        
+        # Split data
+        print("✓ Splitting data...")
+        X_train, X_test, y_train, y_test = split_corpus(corpus)
+        
+        # Vectorize
+        print("\n✓ Vectorizing text...")
+        start = time.perf_counter()
+        vectorizer = make_vectorizer(features, hash_bits)
+        X_train_counts = vectorizer.fit_transform(X_train)
+        X_test_counts = vectorizer.transform(X_test)
+        timings['vectorize'] = time.perf_counter() - start
+        
+        if use_cache:
+            save_features(key, corpus, vectorizer, X_train_counts, X_test_counts, y_train, y_test, cache_dir)
+            print(f"✓ Cached features as {key}")
+    
+    print(f"  Training samples: {X_train_counts.shape[0]}")
+    print(f"  Test samples: {X_test_counts.shape[0]}")
+    
+    start = time.perf_counter()
+    tfidf_transformer = TfidfTransformer()
+    X_train_tfidf = tfidf_transformer.fit_transform(X_train_counts)
+    X_test_tfidf = tfidf_transformer.transform(X_test_counts)
+    timings['tfidf'] = time.perf_counter() - start
+    
+    return vectorizer, tfidf_transformer, X_train_tfidf, X_test_tfidf, y_train, y_test, timings
+
+
+def fit_models(X_train_tfidf, y_train, jobs=1):
+    """Fit LR and NB; concurrently on two threads when jobs > 1
+    
+    Returns (model_lr, model_nb, timings).
+    """
+    def fit(model):
+        start = time.perf_counter()
+        model.fit(X_train_tfidf, y_train)
+        return model, time.perf_counter() - start
+    
+    candidates = [LogisticRegression(max_iter=1000), MultinomialNB()]
+    if jobs > 1:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            (model_lr, lr_time), (model_nb, nb_time) = executor.map(fit, candidates)
+    else:
+        (model_lr, lr_time), (model_nb, nb_time) = map(fit, candidates)
+    return model_lr, model_nb, {'fit_lr': lr_time, 'fit_nb': nb_time}
 
-def clean_text(text):
-    """Preprocess text"""
-    text = re.sub(r'<br />', ' ', str(text))
-    text = re.sub(r'\d+', '', text)
-    text = re.sub(r'[^\w\s]', '', text)
-    text = text.lower()
-    return text
 
+def evaluate_models(model_lr, model_nb, X_test_tfidf, y_test):
+    """Held-out accuracy, precision, recall and F1, keyed like the API's per-model metrics"""
+    evaluation = {}
+    for name, model in [('logistic_regression', model_lr), ('naive_bayes', model_nb)]:
+        y_pred = model.predict(X_test_tfidf)
+        evaluation[name] = {
+            'accuracy': round(float(accuracy_score(y_test, y_pred)), 4),
+            'precision': round(float(precision_score(y_test, y_pred)), 4),
+            'recall': round(float(recall_score(y_test, y_pred)), 4),
+            'f1_score': round(float(f1_score(y_test, y_pred)), 4),
+        }
+    return evaluation
 
-def train_and_save_models():
-    """Train models and save them"""
+
+def measure_latency(bundle_dir, dataset_path, sample=LATENCY_SAMPLE):
+    """Milliseconds per 1000 raw reviews through clean_text and the saved bundle's kernel
+    
+    'single_ms' scores one review per call like /api/predict, 'batch_ms' all of them in one call.
+    """
+    kernel = LinearKernel.from_bundle(load_bundle(bundle_dir))
+    reviews = pd.read_csv(dataset_path, nrows=sample)['review'].astype(str).tolist()
+    score_with_kernel(clean_texts(reviews[:50]), kernel)
+    
+    start = time.perf_counter()
+    for review in reviews:
+        score_with_kernel([clean_text(review)], kernel)
+    single = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    score_with_kernel(clean_texts(reviews), kernel)
+    batch = time.perf_counter() - start
+    
+    per_1k_ms = 1000 / len(reviews) * 1000
+    return {'single_ms': round(single * per_1k_ms, 2), 'batch_ms': round(batch * per_1k_ms, 2),
+            'sample_reviews': len(reviews)}
+
+
+def record_metrics(bundle_dir, dataset_path, vectorizer, X_train_tfidf, X_test_tfidf, evaluation, timings,
+                   model_files=()):
+    """Write the training report next to a freshly saved bundle and return it
+    
+    The server loads it with the models and reports these numbers instead of constants.
+    """
+    file_bytes = {os.path.basename(path): os.path.getsize(path) for path in model_files}
+    live_dir = bundle_path(bundle_dir)
+    file_bytes['bundle'] = sum(os.path.getsize(os.path.join(live_dir, name)) for name in os.listdir(live_dir)
+                               if name != METRICS_FILE and not name.endswith('.tmp'))
+    report = {
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'dataset': os.path.basename(dataset_path),
+        'features': FEATURES_VOCABULARY if hasattr(vectorizer, 'vocabulary_') else FEATURES_HASHED,
+        'corpus': {
+            'reviews': X_train_tfidf.shape[0] + X_test_tfidf.shape[0],
+            'train': X_train_tfidf.shape[0],
+            'test': X_test_tfidf.shape[0],
+        },
+        'vocabulary_size': len(vectorizer.vocabulary_) if hasattr(vectorizer, 'vocabulary_') else None,
+        'n_features': X_train_tfidf.shape[1],
+        'models': evaluation,
+        'training_seconds': round(sum(timings.values()), 3),
+        'stage_seconds': {stage: round(seconds, 3) for stage, seconds in timings.items()},
+        'file_bytes': file_bytes,
+        'latency_per_1k_docs': measure_latency(bundle_dir, dataset_path),
+    }
+    save_metrics(report, bundle_dir)
+    return report
+
+
+def train_and_save_models(dataset_path=DATASET_PATH, jobs=1, use_cache=True,
+                          features=FEATURES_VOCABULARY, hash_bits=HASH_BITS):
+    """Train models and save them
+    
+    The hashed family is saved only as a bundle in models/hashed_bundle/ so it
+    never replaces the vocabulary pickles; serve it with MODEL_VARIANT=hashed.
+    """
     print("=" * 50)
     print("Training Sentiment Analysis Models")
     print("=" * 50)
     
     # Check if dataset exists
-    dataset_path = 'data/IMDB Dataset.csv'
     if not os.path.exists(dataset_path):
         print(f"\n❌ Error: Dataset not found at {dataset_path}")
         print("\nPlease download the IMDB Dataset.csv file and place it in the data/ folder")
@@ -39,89 +252,85 @@ def train_and_save_models():
         return False
     
     print(f"\n✓ Loading dataset from {dataset_path}")
-    df = pd.read_csv(dataset_path)
-    df = shuffle(df, random_state=42)
-    print(f"✓ Loaded {len(df)} reviews")
-    
-    # Preprocess
-    print("\n✓ Preprocessing text...")
-    df['review'] = df['review'].apply(clean_text)
-    df['sentiment'] = df['sentiment'].apply(lambda x: 1 if x.lower() == 'positive' else 0)
-    
-    # Split data
-    print("✓ Splitting data...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        df['review'], df['sentiment'], test_size=0.2, random_state=42
+    vectorizer, tfidf_transformer, X_train_tfidf, X_test_tfidf, y_train, y_test, timings = prepare_features(
+        dataset_path, jobs=jobs, use_cache=use_cache, features=features, hash_bits=hash_bits
     )
-    print(f"  Training samples: {len(X_train)}")
-    print(f"  Test samples: {len(X_test)}")
     
-    # Vectorize
-    print("\n✓ Vectorizing text...")
-    vectorizer = CountVectorizer(stop_words='english')
-    X_train_counts = vectorizer.fit_transform(X_train)
-    X_test_counts = vectorizer.transform(X_test)
+    # Train Logistic Regression and Naive Bayes
+    print(f"\n✓ Training Logistic Regression and Naive Bayes{' concurrently' if jobs > 1 else ''}...")
+    model_lr, model_nb, fit_timings = fit_models(X_train_tfidf, y_train, jobs=jobs)
+    timings.update(fit_timings)
     
-    tfidf_transformer = TfidfTransformer()
-    X_train_tfidf = tfidf_transformer.fit_transform(X_train_counts)
-    X_test_tfidf = tfidf_transformer.transform(X_test_counts)
-    
-    # Train Logistic Regression
-    print("\n✓ Training Logistic Regression...")
-    model_lr = LogisticRegression(max_iter=1000)
-    model_lr.fit(X_train_tfidf, y_train)
-    y_pred_lr = model_lr.predict(X_test_tfidf)
-    
-    acc_lr = accuracy_score(y_test, y_pred_lr)
-    prec_lr = precision_score(y_test, y_pred_lr)
-    rec_lr = recall_score(y_test, y_pred_lr)
-    f1_lr = f1_score(y_test, y_pred_lr)
-    
-    print(f"  Accuracy: {acc_lr:.4f}")
-    print(f"  Precision: {prec_lr:.4f}")
-    print(f"  Recall: {rec_lr:.4f}")
-    print(f"  F1 Score: {f1_lr:.4f}")
-    
-    # Train Naive Bayes
-    print("\n✓ Training Naive Bayes...")
-    model_nb = MultinomialNB()
-    model_nb.fit(X_train_tfidf, y_train)
-    y_pred_nb = model_nb.predict(X_test_tfidf)
-    
-    acc_nb = accuracy_score(y_test, y_pred_nb)
-    prec_nb = precision_score(y_test, y_pred_nb)
-    rec_nb = recall_score(y_test, y_pred_nb)
-    f1_nb = f1_score(y_test, y_pred_nb)
-    
-    print(f"  Accuracy: {acc_nb:.4f}")
-    print(f"  Precision: {prec_nb:.4f}")
-    print(f"  Recall: {rec_nb:.4f}")
-    print(f"  F1 Score: {f1_nb:.4f}")
+    evaluation = evaluate_models(model_lr, model_nb, X_test_tfidf, y_test)
+    for name, key in [('Logistic Regression', 'logistic_regression'), ('Naive Bayes', 'naive_bayes')]:
+        print(f"\n✓ {name}")
+        print(f"  Accuracy: {evaluation[key]['accuracy']:.4f}")
+        print(f"  Precision: {evaluation[key]['precision']:.4f}")
+        print(f"  Recall: {evaluation[key]['recall']:.4f}")
+        print(f"  F1 Score: {evaluation[key]['f1_score']:.4f}")
     
     # Save models
     print("\n✓ Saving models...")
     os.makedirs('models', exist_ok=True)
     
+    if features == FEATURES_HASHED:
+        save_bundle(vectorizer, tfidf_transformer, model_lr, model_nb, HASHED_BUNDLE_DIR)
+        print(f"✓ Hashed models ({vectorizer.n_features} features) saved to {HASHED_BUNDLE_DIR}/")
+        print("  Serve them with MODEL_VARIANT=hashed")
+        report = record_metrics(HASHED_BUNDLE_DIR, dataset_path, vectorizer, X_train_tfidf, X_test_tfidf,
+                                evaluation, timings)
+        print_report(HASHED_BUNDLE_DIR, report)
+        print_timings(timings)
+        return True
+    
     joblib.dump(model_lr, 'models/logreg_model.pkl')
     joblib.dump(model_nb, 'models/naive_bayes_model.pkl')
     joblib.dump(vectorizer, 'models/vectorizer.pkl')
     joblib.dump(tfidf_transformer, 'models/tfidf.pkl')
+    save_bundle(vectorizer, tfidf_transformer, model_lr, model_nb, BUNDLE_DIR)
     
     print("✓ Models saved to models/ folder:")
     print("  - logreg_model.pkl")
     print("  - naive_bayes_model.pkl")
     print("  - vectorizer.pkl")
     print("  - tfidf.pkl")
+    print(f"  - {os.path.basename(BUNDLE_DIR)}/ (fast-start bundle used by app.py)")
     
-    print("\n" + "=" * 50)
-    print("Training completed successfully!")
-    print("=" * 50)
-    
+    report = record_metrics(BUNDLE_DIR, dataset_path, vectorizer, X_train_tfidf, X_test_tfidf, evaluation, timings,
+                            model_files=MODEL_FILES)
+    print_report(BUNDLE_DIR, report)
+    print_timings(timings)
     return True
 
 
-if __name__ == '__main__':
-    train_and_save_models()
+def print_report(bundle_dir, report):
+    latency = report['latency_per_1k_docs']
+    print(f"\n✓ Metrics report saved to {os.path.join(bundle_dir, METRICS_FILE)}")
+    print(f"  Inference per 1k reviews: {latency['single_ms']:.0f} ms one at a time, "
+          f"{latency['batch_ms']:.0f} ms batched")
 
 
+def print_timings(timings):
+    print("\nStage timings:")
+    for stage, seconds in timings.items():
+        print(f"  {stage}: {seconds:.2f}s")
+    
+    print("\n" + "=" * 50)
+    print("Training completed successfully!")
+    print("=" * 50)
 
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train and save sentiment analysis models')
+    parser.add_argument('--dataset', default=DATASET_PATH, help=f'IMDB CSV (default: {DATASET_PATH})')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='processes for text cleaning and concurrent model fitting; 0 = one per core')
+    parser.add_argument('--no-cache', action='store_true', help='ignore and do not write the feature cache')
+    parser.add_argument('--features', choices=[FEATURES_VOCABULARY, FEATURES_HASHED], default=FEATURES_VOCABULARY,
+                        help='fitted vocabulary (default) or fixed-width hashed feature space')
+    parser.add_argument('--hash-bits', type=int, default=HASH_BITS,
+                        help=f'hashed feature space width as a power of two (default: {HASH_BITS})')
+    args = parser.parse_args()
+    
+    train_and_save_models(args.dataset, jobs=args.jobs or os.cpu_count() or 1, use_cache=not args.no_cache,
+                          features=args.features, hash_bits=args.hash_bits)
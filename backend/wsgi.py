@@ -0,0 +1,107 @@
+"""
+Production WSGI entry point
+
+Importing this module loads the models and builds the review aggregates
+once; with Gunicorn's preload_app (see gunicorn.conf.py) that happens in
+the master before workers fork, so every worker shares those pages
+copy-on-write instead of loading its own copy.
+
+The app is wrapped in AdmissionLimiter: at most WEB_THREADS requests run
+per worker, up to WEB_QUEUE more wait for a slot for at most
+WEB_QUEUE_TIMEOUT seconds, and anything beyond that is answered 503 with
+Retry-After straight away instead of piling up behind slow requests.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import gc
+import os
+import threading
+
+import app as sentiment_app
+import metrics
+
+# Requests served concurrently per worker process
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '4'))
+
+# Requests allowed to wait for a free slot per worker before answering 503
+WEB_QUEUE = int(os.environ.get('WEB_QUEUE', '16'))
+
+# Seconds a queued request waits for a slot before answering 503
+WEB_QUEUE_TIMEOUT = float(os.environ.get('WEB_QUEUE_TIMEOUT', '5'))
+
+# Never rejected, so load balancer health checks and metrics scrapes keep working under load
+EXEMPT_PATHS = frozenset(['/api/health', '/metrics'])
+
+
+class AdmissionLimiter:
+    """WSGI middleware bounding concurrent and queued requests"""
+
+    def __init__(self, wsgi_app, max_active=WEB_THREADS, max_queued=WEB_QUEUE, queue_timeout=WEB_QUEUE_TIMEOUT,
+                 exempt_paths=EXEMPT_PATHS):
+        self.wsgi_app = wsgi_app
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.exempt_paths = exempt_paths
+        self.queued = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_active)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO') in self.exempt_paths:
+            return self.wsgi_app(environ, start_response)
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queued:
+                    self.rejected += 1
+                    return self._reject(start_response)
+                self.queued += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.queued -= 1
+            if not admitted:
+                with self._lock:
+                    self.rejected += 1
+                return self._reject(start_response)
+
+        try:
+            # Flask returns a fully buffered response, so the slot can be released on return
+            return self.wsgi_app(environ, start_response)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _reject(start_response):
+        body = b'{"error": "Server is busy, retry shortly"}'
+        start_response('503 Service Unavailable', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', '1'),
+        ])
+        return [body]
+
+
+def preload():
+    """Load models and review aggregates in the current (master) process"""
+    sentiment_app.load_models()
+    if sentiment_app.model_registry.current is None:
+        print("ℹ Models are not loaded; serving lexicon predictions. Run: python train_models.py")
+    sentiment_app.review_store.ensure_loaded()
+    # Move everything loaded so far out of the GC's reach; collections in the
+    # workers would otherwise touch these objects and un-share their pages
+    gc.freeze()
+
+
+preload()
+application = AdmissionLimiter(sentiment_app.app)
+
+if metrics.ENABLED:
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_admission_rejected_total', 'Requests answered 503 by the admission limiter',
+        lambda: application.rejected, 'counter'))
+    metrics.REGISTRY.register(metrics.Sampled(
+        'sentiment_admission_queued', 'Requests waiting for a free slot', lambda: application.queued))
@@ -51,14 +51,14 @@ class ModelPrediction {
   final int positiveReviews;
   final int negativeReviews;
   final double averageConfidence;
-  final Map<String, dynamic> metrics;
+  final Map<String, dynamic>? metrics; // null without a training report
 
   ModelPrediction({
     required this.prediction,
     required this.positiveReviews,
     required this.negativeReviews,
     required this.averageConfidence,
-    required this.metrics,
+    this.metrics,
   });
 
   factory ModelPrediction.fromJson(Map<String, dynamic> json) {
@@ -67,7 +67,7 @@ class ModelPrediction {
       positiveReviews: json['positive_reviews'] as int,
       negativeReviews: json['negative_reviews'] as int,
       averageConfidence: (json['average_confidence'] as num).toDouble(),
-      metrics: json['metrics'] as Map<String, dynamic>,
+      metrics: json['metrics'] as Map<String, dynamic>?,
     );
   }
 }
@@ -24,19 +24,21 @@ class ModelMetrics {
 class ModelResult {
   final String prediction;
   final double probability;
-  final ModelMetrics metrics;
+  final ModelMetrics? metrics; // null in lexicon mode or without a training report
 
   ModelResult({
     required this.prediction,
     required this.probability,
-    required this.metrics,
+    this.metrics,
   });
 
   factory ModelResult.fromJson(Map<String, dynamic> json) {
     return ModelResult(
       prediction: json['prediction'] as String,
       probability: (json['probability'] as num).toDouble(),
-      metrics: ModelMetrics.fromJson(json['metrics']),
+      metrics: json['metrics'] == null
+          ? null
+          : ModelMetrics.fromJson(json['metrics'] as Map<String, dynamic>),
     );
   }
 }